@@ -5,6 +5,7 @@ Testa MODO INTELIGENTE vs outros modos
 """
 
 from busca_materiais_planilha_inteligente import BuscadorInteligente
+from produto import produtos_para_json
 import pandas as pd
 import argparse
 
@@ -54,8 +55,8 @@ def testar_modo_inteligente(arquivo_planilha='materiais.xlsx', num_linhas=3, sal
             if resultado.get('produtos'):
                 print(f"\n🏆 TOP 5 PRODUTOS:")
                 for i, p in enumerate(resultado['produtos'][:5], 1):
-                    print(f"   {i}. [{p.get('score_relevancia', 0):.2f}] {p['nome'][:65]}")
-                    print(f"      💰 R$ {p['preco']:.2f}")
+                    print(f"   {i}. [{p.score_relevancia:.2f}] {p.nome[:65]}")
+                    print(f"      💰 R$ {p.preco:.2f}")
             else:
                 print(f"\n❌ Nenhum produto com TODAS as palavras obrigatórias")
             
@@ -70,7 +71,7 @@ def testar_modo_inteligente(arquivo_planilha='materiais.xlsx', num_linhas=3, sal
                 outliers_removidos = 0
                 
                 if produtos:
-                    precos = [p['preco'] for p in produtos if 'preco' in p]
+                    precos = [p.preco for p in produtos]
                     if precos:
                         precos.sort()
                         n = len(precos)
@@ -96,7 +97,7 @@ def testar_modo_inteligente(arquivo_planilha='materiais.xlsx', num_linhas=3, sal
                     'Preco_Mediana': preco_mediana,
                     'Desvio_Padrao': desvio_padrao,
                     'Outliers_Removidos': outliers_removidos,
-                    'Links_Produtos_JSON': resultado.get('links_produtos', ''),
+                    'Links_Produtos_JSON': produtos_para_json(produtos),
                     'Status_Busca': resultado.get('status', ''),
                     'Data_Hora_Busca': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
                 })
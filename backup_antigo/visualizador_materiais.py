@@ -3,17 +3,34 @@
 """
 Visualizador de Materiais - Interface Web
 Exibe dados da planilha gerada por busca_materiais_planilha.py
+
+A planilha é lida uma vez: o JSON dos produtos é decodificado e cada
+material já fica serializado para a API, com o nome em minúsculas para
+a busca e a ordem de cada coluna calculada na primeira vez em que é usada.
+/api/materiais devolve uma página por vez (cursor), comprimida com gzip
+e com ETag (a mesma consulta responde 304).
 """
 
 import pandas as pd
+import gzip
+import hashlib
 import json
 import argparse
-from flask import Flask, render_template, jsonify
+import threading
+from collections import OrderedDict
+from flask import Flask, Response, render_template, jsonify, request
 from datetime import datetime
 import sys
 import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts', 'core'))
+from planilhas import carregar_planilha
+from paginas_comprimidas import codificacoes_aceitas
+
+app = Flask(__name__, template_folder=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'templates'))
 
-app = Flask(__name__)
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+RESPOSTAS_EM_CACHE = 256
 
 # Variável global para armazenar os dados
 dados_planilha = None
@@ -25,13 +42,20 @@ class VisualizadorMateriais:
     def __init__(self, arquivo_xlsx):
         self.arquivo = arquivo_xlsx
         self.df = None
+        self.materiais_json = []     # cada material já serializado (str)
+        self.nomes_minusculos = []   # para a busca por nome
+        self.ordens = {}             # (coluna, ordem) -> (posições ordenadas, posto de cada posição)
+        self.filtros = OrderedDict() # filtro -> posições que casam (últimos usados)
+        self.respostas = OrderedDict()  # consulta + codificação -> (etag, corpo)
+        self.trava_caches = threading.Lock()  # o Flask atende cada requisição em uma thread
+        self.versao = ''
         self.carregar_dados()
     
     def carregar_dados(self):
         """Carrega dados da planilha Excel"""
         try:
             print(f"📖 Carregando planilha: {self.arquivo}")
-            self.df = pd.read_excel(self.arquivo)
+            self.df = carregar_planilha(self.arquivo)
             
             # Aceita tanto 'Nome' quanto 'Nome_Original'
             if 'Nome_Original' in self.df.columns and 'Nome' not in self.df.columns:
@@ -61,6 +85,9 @@ class VisualizadorMateriais:
                     self.df[coluna] = valor_padrao
                     print(f"   📝 Adicionando coluna padrão: {coluna}")
             
+            self.df = self.df.reset_index(drop=True)
+            self.preparar_materiais()
+            
             print(f"✅ Planilha carregada com sucesso!")
             print(f"📊 Total de materiais: {len(self.df)}")
             
@@ -92,28 +119,21 @@ class VisualizadorMateriais:
         
         return resumo
     
-    def obter_materiais(self, filtro=None, ordenar_por='Nome', ordem='asc'):
-        """Obtém lista de materiais com filtros e ordenação"""
-        if self.df is None:
-            return []
-        
-        df_filtrado = self.df.copy()
-        
-        # Aplica filtro de busca
-        if filtro and filtro.strip():
-            df_filtrado = df_filtrado[
-                df_filtrado['Nome'].str.contains(filtro, case=False, na=False)
-            ]
-        
-        # Ordena
-        if ordenar_por in df_filtrado.columns:
-            ascending = (ordem == 'asc')
-            df_filtrado = df_filtrado.sort_values(by=ordenar_por, ascending=ascending)
-        
-        # Converte para lista de dicionários
-        materiais = []
-        for idx, row in df_filtrado.iterrows():
-            material = {
+    def preparar_materiais(self):
+        """Decodifica os produtos e serializa cada material uma vez só"""
+        self.materiais_json = [json.dumps(self._material(row), ensure_ascii=False, default=str)
+                               for row in self.df.to_dict('records')]
+        self.nomes_minusculos = [str(nome).lower() for nome in self.df['Nome']]
+        self.ordens.clear()
+        with self.trava_caches:
+            self.filtros.clear()
+            self.respostas.clear()
+        # Entra no ETag: outra planilha (ou a mesma alterada) invalida as respostas
+        self.versao = hashlib.sha1('\n'.join(self.materiais_json).encode('utf-8')).hexdigest()[:12]
+    
+    def _material(self, row):
+        """Dicionário de um material para a API"""
+        return {
                 'nome': row['Nome'],
                 'total_produtos': int(row['Total_Produtos_Encontrados']) if pd.notna(row['Total_Produtos_Encontrados']) else 0,
                 'preco_minimo': float(row['Preco_Minimo']) if pd.notna(row['Preco_Minimo']) else None,
@@ -126,9 +146,106 @@ class VisualizadorMateriais:
                 'data_busca': row['Data_Hora_Busca'] if pd.notna(row['Data_Hora_Busca']) else None,
                 'produtos_json': self._parse_json(row['Links_Produtos_JSON']) if pd.notna(row['Links_Produtos_JSON']) else []
             }
-            materiais.append(material)
+    
+    def ordenacao(self, ordenar_por='Nome', ordem='asc'):
+        """
+        Posições dos materiais na ordem pedida e o posto de cada posição
         
-        return materiais
+        Calculada uma vez por coluna/ordem; nomes são comparados em
+        minúsculas e valores vazios ficam no fim.
+        """
+        if ordenar_por not in self.df.columns:
+            ordenar_por = None
+        chave = (ordenar_por, ordem == 'asc')
+        if chave not in self.ordens:
+            if ordenar_por is None:
+                posicoes = list(range(len(self.df)))
+            else:
+                coluna = self.df[ordenar_por]
+                if ordenar_por == 'Nome':
+                    coluna = pd.Series(self.nomes_minusculos)
+                posicoes = coluna.sort_values(ascending=chave[1], kind='stable', na_position='last').index.tolist()
+            postos = [0] * len(posicoes)
+            for posto, posicao in enumerate(posicoes):
+                postos[posicao] = posto
+            self.ordens[chave] = (posicoes, postos)
+        return self.ordens[chave]
+    
+    def filtrar(self, filtro):
+        """Posições cujo nome contém o filtro (sem diferenciar maiúsculas); None = todas"""
+        filtro = (filtro or '').strip().lower()
+        if not filtro:
+            return None
+        with self.trava_caches:
+            if filtro in self.filtros:
+                self.filtros.move_to_end(filtro)
+                return self.filtros[filtro]
+        # A busca roda fora da trava: duas threads com o mesmo filtro só repetem o trabalho
+        selecionados = {i for i, nome in enumerate(self.nomes_minusculos) if filtro in nome}
+        with self.trava_caches:
+            self.filtros[filtro] = selecionados
+            if len(self.filtros) > RESPOSTAS_EM_CACHE:
+                self.filtros.popitem(last=False)
+        return selecionados
+    
+    def obter_materiais(self, filtro=None, ordenar_por='Nome', ordem='asc', cursor=None, limite=None):
+        """
+        Página de materiais com filtro e ordenação
+        
+        cursor é o posto (na ordem pedida) do primeiro material da página;
+        None começa do início. Devolve (materiais JSON, total filtrado,
+        próximo cursor ou None no fim).
+        """
+        if self.df is None:
+            return [], 0, None
+        
+        posicoes, postos = self.ordenacao(ordenar_por, ordem)
+        selecionados = self.filtrar(filtro)
+        inicio = max(int(cursor or 0), 0)
+        limite = limite or len(posicoes)
+        
+        pagina = []
+        proximo = None
+        for posto in range(inicio, len(posicoes)):
+            posicao = posicoes[posto]
+            if selecionados is not None and posicao not in selecionados:
+                continue
+            if len(pagina) == limite:
+                proximo = posto
+                break
+            pagina.append(self.materiais_json[posicao])
+        
+        total = len(posicoes) if selecionados is None else len(selecionados)
+        return pagina, total, proximo
+    
+    def resposta_materiais(self, filtro, ordenar_por, ordem, cursor, limite, accept_encoding):
+        """
+        (etag, corpo, codificação) de /api/materiais
+        
+        O ETag depende só da consulta e da versão dos dados; a resposta
+        (já comprimida) fica guardada para as consultas repetidas.
+        """
+        codificacao = 'gzip' if codificacoes_aceitas(accept_encoding).get('gzip', 0) > 0 else None
+        consulta = json.dumps([self.versao, (filtro or '').strip().lower(), ordenar_por, ordem, cursor, limite])
+        etag = f'"{hashlib.sha1(consulta.encode("utf-8")).hexdigest()[:20]}{"-gz" if codificacao else ""}"'
+        
+        chave = (etag, codificacao)
+        with self.trava_caches:
+            if chave in self.respostas:
+                self.respostas.move_to_end(chave)
+                return (etag,) + self.respostas[chave]
+        
+        pagina, total, proximo = self.obter_materiais(filtro, ordenar_por, ordem, cursor, limite)
+        corpo = ('{"materiais":[' + ','.join(pagina) + '],'
+                 f'"total":{total},"proximo_cursor":{json.dumps(proximo)},"limite":{limite}}}').encode('utf-8')
+        if codificacao:
+            corpo = gzip.compress(corpo, compresslevel=6)
+        
+        with self.trava_caches:
+            self.respostas[chave] = (corpo, codificacao)
+            if len(self.respostas) > RESPOSTAS_EM_CACHE:
+                self.respostas.popitem(last=False)
+        return etag, corpo, codificacao
     
     def _parse_json(self, json_str):
         """Parse string JSON para lista de produtos"""
@@ -159,20 +276,33 @@ def api_resumo():
 
 @app.route('/api/materiais')
 def api_materiais():
-    """API: Retorna lista de materiais"""
+    """
+    API: Página de materiais
+    
+    Parâmetros: filtro, ordenar_por, ordem (asc/desc), limite (padrão 50)
+    e cursor (o proximo_cursor da página anterior).
+    """
     if visualizador is None:
         return jsonify({'erro': 'Dados não carregados'}), 500
     
-    from flask import request
     filtro = request.args.get('filtro', '')
     ordenar_por = request.args.get('ordenar_por', 'Nome')
     ordem = request.args.get('ordem', 'asc')
+    try:
+        cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+        limite = min(max(int(request.args.get('limite', LIMITE_PADRAO)), 1), LIMITE_MAXIMO)
+    except ValueError:
+        return jsonify({'erro': 'cursor e limite devem ser números'}), 400
+    
+    etag, corpo, codificacao = visualizador.resposta_materiais(
+        filtro, ordenar_por, ordem, cursor, limite, request.headers.get('Accept-Encoding'))
     
-    materiais = visualizador.obter_materiais(filtro, ordenar_por, ordem)
-    return jsonify({
-        'materiais': materiais,
-        'total': len(materiais)
-    })
+    cabecalhos = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if etag in [e.strip() for e in request.headers.get('If-None-Match', '').split(',')]:
+        return Response(status=304, headers=cabecalhos)
+    if codificacao:
+        cabecalhos['Content-Encoding'] = codificacao
+    return Response(corpo, mimetype='application/json', headers=cabecalhos)
 
 def main():
     """Função principal"""
@@ -4,10 +4,16 @@
 Script para atualizar páginas HTML com localStorage e correção de bugs
 """
 
+import hashlib
+import json
 import os
 import glob
 import shutil
+import sys
 from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+from paginas_comprimidas import gravar_pagina
+from produto import hash_produtos_pagina
 
 def atualizar_pagina(arquivo):
     """Atualiza uma página HTML com o template mais recente"""
@@ -27,6 +33,13 @@ def atualizar_pagina(arquivo):
     
     dados_json = match.group(1)
     
+    # Catálogo de produtos (páginas antigas trazem os produtos dentro de DADOS)
+    match_catalogo = re.search(r'const CATALOGO = (\{.*?\});\s*\n', conteudo_antigo, re.DOTALL)
+    catalogo_json = match_catalogo.group(1) if match_catalogo else '{}'
+    # Chaves dos removidos por posição (formatos anteriores), convertidos para ids pela página
+    hash_conteudo = hash_produtos_pagina(json.loads(dados_json))
+    hash_anterior = hashlib.sha1(f'{catalogo_json}\n{dados_json}'.encode('utf-8')).hexdigest()[:16]
+    
     # Extrair título
     match_titulo = re.search(r'<title>(.*?)</title>', conteudo_antigo)
     titulo = match_titulo.group(1) if match_titulo else "Busca de Preços"
@@ -51,15 +64,17 @@ def atualizar_pagina(arquivo):
     html_atualizado = template_novo.replace('{{TITULO}}', titulo)
     html_atualizado = html_atualizado.replace('{{DATA_GERACAO}}', data_geracao)
     html_atualizado = html_atualizado.replace('{{TOTAL_MATERIAIS}}', total_materiais)
+    html_atualizado = html_atualizado.replace('{{CATALOGO_JSON}}', catalogo_json)
     html_atualizado = html_atualizado.replace('{{DADOS_JSON}}', dados_json)
+    html_atualizado = html_atualizado.replace('{{HASH_CONTEUDO}}', hash_conteudo)
+    html_atualizado = html_atualizado.replace('{{HASH_ANTERIOR}}', hash_anterior)
     
     # Fazer backup
     backup_path = arquivo + '.backup'
     shutil.copy2(arquivo, backup_path)
     
-    # Salvar página atualizada
-    with open(arquivo, 'w', encoding='utf-8') as f:
-        f.write(html_atualizado)
+    # Salvar página atualizada (e as cópias .gz/.br)
+    gravar_pagina(arquivo, html_atualizado)
     
     print(f"   ✅ Atualizado! (backup: {os.path.basename(backup_path)})")
     return True
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Consolida as exportações validadas das páginas (uma planilha por parte)
+de volta na planilha original
+
+Cada exportação ("Busca de Preços - Parte N_AAAA-MM-DD.xlsx") tem uma linha
+por material com as estatísticas e a coluna Produtos_JSON. As planilhas são
+lidas em streaming (openpyxl read-only), os JSON são decodificados de uma vez
+(linhas com Produtos_JSON inválido são avisadas e ignoradas) e o resultado é juntado a materiais.xlsx pelo nome do material. Se o mesmo
+material aparecer em mais de uma exportação, vale a mais recente.
+
+Saída: um .xlsx gravado linha a linha (xlsxwriter constant_memory, ou
+openpyxl write-only sem xlsxwriter) e uma cópia .parquet (se pyarrow ou
+fastparquet estiver instalado).
+"""
+
+import glob
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+from historico_custos import chave_material
+from planilhas import carregar_planilha, ler_excel_streaming
+
+PASTA_EXPORTACOES_PADRAO = 'output/exportacoes'
+PASTA_SAIDA_PADRAO = 'output/consolidado'
+
+# Colunas da exportação da página (exportarExcel em templates/pagina_estatica.html)
+COLUNAS_EXPORTACAO = ['Material', 'Quantidade_Produtos', 'Preco_Minimo', 'Preco_Maximo', 'Preco_Medio',
+                      'Preco_Mediana', 'Preco_Moda', 'Desvio_Padrao', 'Produtos_JSON']
+
+_RE_PARTE = re.compile(r'Parte (\d+)', re.IGNORECASE)
+_RE_DATA = re.compile(r'_(\d{4}-\d{2}-\d{2})')
+
+def listar_exportacoes(caminhos):
+    """
+    Planilhas exportadas, da mais antiga para a mais recente
+
+    caminhos: arquivos, pastas ou padrões glob. A ordem usa a data do nome
+    do arquivo e, no mesmo dia, a data de modificação (downloads repetidos
+    viram "..._AAAA-MM-DD (1).xlsx").
+    """
+    arquivos = set()
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            arquivos.update(glob.glob(os.path.join(caminho, '*.xlsx')))
+        else:
+            arquivos.update(glob.glob(caminho))
+
+    def ordem(arquivo):
+        data = _RE_DATA.search(os.path.basename(arquivo))
+        return (data.group(1) if data else '', os.path.getmtime(arquivo))
+
+    arquivos = [a for a in arquivos if not os.path.basename(a).startswith('~$')]
+    return sorted(arquivos, key=ordem)
+
+def linhas_json_invalidas(produtos_json):
+    """
+    Índices das células de Produtos_JSON que não são uma lista JSON
+
+    Caminho rápido: todas as células decodificadas de uma vez (o caso comum);
+    só se falhar cada célula é decodificada separadamente.
+    """
+    textos = produtos_json.fillna('[]').astype(str)
+    try:
+        listas = json.loads('[' + ','.join(textos) + ']')
+        if len(listas) == len(textos) and all(isinstance(lista, list) for lista in listas):
+            return []
+    except ValueError:
+        pass
+
+    invalidas = []
+    for indice, texto in textos.items():
+        try:
+            if not isinstance(json.loads(texto), list):
+                invalidas.append(indice)
+        except ValueError:
+            invalidas.append(indice)
+    return invalidas
+
+def ler_exportacoes(arquivos):
+    """
+    Todas as exportações num DataFrame só, com Parte, Arquivo_Exportacao e a ordem de leitura
+
+    Linhas com Produtos_JSON inválido (editado à mão, cortado pelo Excel em
+    32.767 caracteres) são avisadas com arquivo e material e ficam de fora.
+    """
+    import pandas as pd
+
+    tabelas = []
+    for ordem, arquivo in enumerate(arquivos):
+        df = ler_excel_streaming(arquivo)
+        faltando = [c for c in COLUNAS_EXPORTACAO if c not in df.columns]
+        if faltando:
+            print(f"   ⚠️  {os.path.basename(arquivo)}: não é uma exportação das páginas (faltam {faltando}), ignorada")
+            continue
+        parte = _RE_PARTE.search(os.path.basename(arquivo))
+        df = df.loc[df['Material'].notna(), COLUNAS_EXPORTACAO]
+        invalidas = linhas_json_invalidas(df['Produtos_JSON'])
+        for indice in invalidas:
+            print(f"   ⚠️  {os.path.basename(arquivo)}, linha {indice + 2} ({df.at[indice, 'Material']}): "
+                  f"Produtos_JSON inválido, material ignorado")
+        df = df.drop(index=invalidas)
+        df.insert(1, 'Parte', int(parte.group(1)) if parte else None)
+        df['Arquivo_Exportacao'] = os.path.basename(arquivo)
+        df['_ordem'] = ordem
+        tabelas.append(df)
+        print(f"   📄 {os.path.basename(arquivo)}: {len(df)} materiais")
+
+    if not tabelas:
+        return None
+    return pd.concat(tabelas, ignore_index=True)
+
+def resumir_produtos(produtos_json):
+    """
+    Produto de menor preço de cada material, a partir de Produtos_JSON
+
+    Os JSON são decodificados numa chamada só (uma lista de listas) e
+    achatados numa tabela material × produto; o menor preço sai de um
+    groupby. Devolve DataFrame indexado como produtos_json.
+    """
+    import pandas as pd
+
+    textos = produtos_json.fillna('[]').astype(str)
+    listas = json.loads('[' + ','.join(textos) + ']')
+
+    posicoes = [i for i, produtos in enumerate(listas) for _ in produtos]
+    produtos = pd.DataFrame.from_records(
+        [p for lista in listas for p in lista], columns=['nome', 'preco', 'score', 'link']
+    )
+    produtos['_linha'] = produtos_json.index.to_numpy()[posicoes] if posicoes else []
+    produtos['preco'] = pd.to_numeric(produtos['preco'], errors='coerce')
+
+    validos = produtos.dropna(subset=['preco'])
+    menores = validos.loc[validos.groupby('_linha')['preco'].idxmin()].set_index('_linha')
+
+    return pd.DataFrame({
+        'Produto_Menor_Preco': menores['nome'],
+        'Link_Menor_Preco': menores['link']
+    }).reindex(produtos_json.index)
+
+def consolidar(arquivo_materiais, exportacoes):
+    """Planilha original + estatísticas validadas (última exportação de cada material)"""
+    import pandas as pd
+
+    base = carregar_planilha(arquivo_materiais)
+    if 'Nome' not in base.columns:
+        raise ValueError(f"{arquivo_materiais} deve ter a coluna 'Nome'")
+
+    # Última exportação de cada material
+    exportacoes['_chave'] = exportacoes['Material'].map(chave_material)
+    exportacoes = (exportacoes.sort_values('_ordem', kind='stable')
+                   .drop_duplicates('_chave', keep='last')
+                   .drop(columns=['_ordem']))
+    exportacoes = exportacoes.join(resumir_produtos(exportacoes['Produtos_JSON']))
+
+    base = base.assign(_chave=base['Nome'].map(chave_material))
+    consolidado = base.merge(exportacoes.drop(columns=['Material']), on='_chave', how='left',
+                             validate='many_to_one', indicator=True)
+
+    sem_exportacao = int((consolidado['_merge'] == 'left_only').sum())
+    fora_da_base = sorted(set(exportacoes['_chave']) - set(base['_chave']))
+
+    consolidado = consolidado.drop(columns=['_chave', '_merge'])
+    consolidado['Validado'] = consolidado['Arquivo_Exportacao'].notna()
+    return consolidado, sem_exportacao, fora_da_base
+
+def salvar_xlsx_streaming(df, arquivo):
+    """
+    Grava o .xlsx linha a linha, sem montar a planilha na memória
+
+    xlsxwriter em constant_memory; sem ele, openpyxl write-only.
+    (DataFrame.to_excel escreve coluna a coluna, o que o constant_memory não aceita.)
+    """
+    linhas = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    cabecalho = [str(c) for c in df.columns]
+
+    try:
+        import xlsxwriter
+    except ImportError:
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Materiais')
+        ws.append(cabecalho)
+        for linha in linhas:
+            ws.append(linha)
+        wb.save(arquivo)
+        return 'openpyxl write-only'
+
+    wb = xlsxwriter.Workbook(arquivo, {'constant_memory': True, 'strings_to_urls': False})
+    ws = wb.add_worksheet('Materiais')
+    ws.write_row(0, 0, cabecalho)
+    for i, linha in enumerate(linhas, 1):
+        ws.write_row(i, 0, linha)
+    wb.close()
+    return 'xlsxwriter constant_memory'
+
+def salvar_parquet(df, arquivo):
+    """Cópia .parquet (False se não houver pyarrow nem fastparquet)"""
+    try:
+        df.to_parquet(arquivo, index=False)
+    except ImportError:
+        return False
+    return True
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Consolida as exportações validadas das partes na planilha original',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Salve as planilhas exportadas pelas páginas ("📊 Exportar para Excel") em
+{PASTA_EXPORTACOES_PADRAO}/ (ou indique os arquivos). Se um material aparecer em
+mais de uma exportação, vale a mais recente.
+
+Exemplos:
+  # Todas as exportações de {PASTA_EXPORTACOES_PADRAO}/
+  python3 consolidar_exportacoes.py
+
+  # Exportações da pasta de downloads
+  python3 consolidar_exportacoes.py ~/Downloads/"Busca de Preços - Parte"*.xlsx
+
+  # Planilha original em outro lugar
+  python3 consolidar_exportacoes.py -m dados/materiais.xlsx
+        """
+    )
+
+    parser.add_argument('exportacoes', nargs='*', default=[PASTA_EXPORTACOES_PADRAO],
+                        help=f'Planilhas exportadas, pastas ou padrões (padrão: {PASTA_EXPORTACOES_PADRAO})')
+    parser.add_argument('-m', '--materiais', default='materiais.xlsx',
+                        help='Planilha original (padrão: materiais.xlsx)')
+    parser.add_argument('-o', '--pasta-saida', default=PASTA_SAIDA_PADRAO,
+                        help=f'Pasta do resultado (padrão: {PASTA_SAIDA_PADRAO})')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.materiais):
+        print(f"❌ Planilha original não encontrada: {args.materiais}")
+        return 1
+
+    arquivos = listar_exportacoes(args.exportacoes)
+    if not arquivos:
+        print(f"❌ Nenhuma exportação encontrada em: {' '.join(args.exportacoes)}")
+        print(f"\n💡 Exporte as páginas validadas (📊 Exportar para Excel) e salve em {PASTA_EXPORTACOES_PADRAO}/")
+        return 1
+
+    print(f"\n{'='*80}")
+    print(f"🧩 CONSOLIDAÇÃO DAS EXPORTAÇÕES")
+    print(f"{'='*80}\n")
+
+    inicio = time.perf_counter()
+    exportacoes = ler_exportacoes(arquivos)
+    if exportacoes is None:
+        print(f"❌ Nenhuma das planilhas é uma exportação das páginas")
+        return 1
+
+    consolidado, sem_exportacao, fora_da_base = consolidar(args.materiais, exportacoes)
+
+    if not os.path.exists(args.pasta_saida):
+        os.makedirs(args.pasta_saida)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    arquivo_xlsx = os.path.join(args.pasta_saida, f'materiais_consolidado_{timestamp}.xlsx')
+    arquivo_parquet = os.path.splitext(arquivo_xlsx)[0] + '.parquet'
+
+    modo = salvar_xlsx_streaming(consolidado, arquivo_xlsx)
+    tem_parquet = salvar_parquet(consolidado, arquivo_parquet)
+
+    validados = int(consolidado['Validado'].sum())
+    print(f"\n✅ {validados}/{len(consolidado)} materiais com exportação validada "
+          f"({len(arquivos)} planilhas, {time.perf_counter() - inicio:.1f}s)")
+    if sem_exportacao:
+        print(f"⚠️  {sem_exportacao} materiais da planilha original sem exportação")
+    if fora_da_base:
+        print(f"⚠️  {len(fora_da_base)} materiais exportados que não estão em {args.materiais}:")
+        for nome in fora_da_base[:10]:
+            print(f"   - {nome}")
+        if len(fora_da_base) > 10:
+            print(f"   ... e mais {len(fora_da_base) - 10}")
+
+    print(f"\n💾 {arquivo_xlsx} ({modo})")
+    if tem_parquet:
+        print(f"💾 {arquivo_parquet}")
+    else:
+        print(f"💡 Cópia .parquet não gerada: pip install pyarrow")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Consulta o histórico de preços (output/historico/precos.sqlite)
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+from historico_precos import ARQUIVO_HISTORICO_PADRAO, LIMIAR_VARIACAO_PADRAO, HistoricoPrecos
+
+def formatar_preco(valor):
+    return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if valor is not None else '-'
+
+def mostrar_variacoes(historico, limiar):
+    """Materiais cuja mediana variou ao menos limiar % entre as duas últimas execuções"""
+    variacoes = historico.variacoes(limiar)
+
+    print(f"\n📈 Materiais com mediana variando ≥ {limiar:g}%: {len(variacoes)}\n")
+    for v in variacoes:
+        seta = '📈' if v['percentual'] > 0 else '📉'
+        print(f"   {seta} {v['percentual']:+7.1f}%  {formatar_preco(v['anterior']):>14} → "
+              f"{formatar_preco(v['atual']):<14} {v['nome']}")
+    return 0
+
+def mostrar_ultimos(historico):
+    """Estatísticas mais recentes de cada material"""
+    linhas = historico.ultimos_por_material()
+
+    print(f"\n🗃️  Últimos preços de {len(linhas)} materiais:\n")
+    print(f"   {'mediana':>14}  {'produtos':>8}  {'data':<19}  material")
+    for linha in linhas:
+        print(f"   {formatar_preco(linha['preco_mediana']):>14}  {linha['total_produtos']:>8}  "
+              f"{linha['iniciada_em']:<19}  {linha['nome']}")
+    return 0
+
+def mostrar_serie(historico, nome_material):
+    """Mediana do material em cada execução"""
+    linhas = historico.serie_material(nome_material)
+
+    if not linhas:
+        print(f"❌ Material não encontrado no histórico: {nome_material}")
+        return 1
+
+    print(f"\n📊 {nome_material}\n")
+    for linha in linhas:
+        marca = ' ♻️' if linha['inalterado'] else ''
+        print(f"   {linha['iniciada_em']:<19}  {formatar_preco(linha['preco_mediana']):>14}  "
+              f"{linha['total_produtos']:>3} produtos  {linha['status']}{marca}")
+    return 0
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Consulta o histórico de preços por material',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Cada processamento de parte acrescenta uma execução ao histórico.
+
+Exemplos:
+  # Materiais cuja mediana mudou 5% ou mais (padrão)
+  python3 consultar_historico.py
+
+  # Só variações de 20% ou mais
+  python3 consultar_historico.py --variacao 20
+
+  # Preço mais recente de cada material
+  python3 consultar_historico.py --ultimos
+
+  # Evolução de um material
+  python3 consultar_historico.py --material "ATLETISMO - Apito"
+        """
+    )
+
+    parser.add_argument('--arquivo', default=ARQUIVO_HISTORICO_PADRAO,
+                        help=f'Banco do histórico (padrão: {ARQUIVO_HISTORICO_PADRAO})')
+    parser.add_argument('--variacao', type=float, default=LIMIAR_VARIACAO_PADRAO, metavar='PCT',
+                        help=f'Variação mínima da mediana, em %% (padrão: {LIMIAR_VARIACAO_PADRAO:g})')
+    parser.add_argument('--ultimos', action='store_true',
+                        help='Listar o preço mais recente de cada material')
+    parser.add_argument('--material', help='Mostrar a evolução de um material')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.arquivo):
+        print(f"❌ Histórico não encontrado: {args.arquivo}")
+        print(f"\n💡 Processe ao menos uma parte primeiro:")
+        print(f"   python3 processar_parte.py -p 1")
+        return 1
+
+    historico = HistoricoPrecos(args.arquivo)
+    try:
+        if args.material:
+            return mostrar_serie(historico, args.material)
+        if args.ultimos:
+            return mostrar_ultimos(historico)
+        return mostrar_variacoes(historico, args.variacao)
+    finally:
+        historico.fechar()
+
+if __name__ == "__main__":
+    sys.exit(main())
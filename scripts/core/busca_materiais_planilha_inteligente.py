@@ -6,27 +6,72 @@ Confia no mecanismo de busca do Mercado Livre
 Pontua produtos por relevância (não elimina)
 """
 
-import pandas as pd
-import requests
 from bs4 import BeautifulSoup
-import json
 import statistics
 import time
 import re
 from urllib.parse import quote
 from datetime import datetime
+from math import nan
 import logging
+from planilhas import ler_tabela, salvar_tabela
+from produto import CatalogoProdutos, ItemMaterial, Produto, produtos_para_json
+from metricas import MedidorNulo, MedidorTempos, arquivo_tempos_padrao
+from transporte import ErroRede, Transporte, adicionar_argumentos_transporte, opcoes_transporte_args
+from disjuntor import Disjuntor
+from cache_buscas import CacheBuscas, hash_produtos
+from historico_custos import chave_material
+from remocoes import ARQUIVO_REMOCOES_PADRAO, carregar_remocoes, removidos_por_material
+from modelo_relevancia import ARQUIVO_MODELO_PADRAO, ModeloRelevancia
+from tentativas import (ASSINATURAS_BLOQUEIO, ASSINATURAS_SEM_RESULTADOS, BLOQUEADO,
+                        INESPERADO, LAYOUT_ALTERADO, LIMITADO, TRANSITORIO, VAZIO, FalhaBusca,
+                        FilaAdiada, PoliticaTentativas, classificar_status, contem_assinatura,
+                        ler_retry_after)
+from configuracao_log import DETALHE, INICIO_MATERIAL, adicionar_argumentos_log, configurar_logging_args
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('output/logs/busca_materiais_inteligente.log'),
-        logging.StreamHandler()
-    ]
-)
+# Saída configurada pelos scripts de entrada (configuracao_log.configurar_logging)
 logger = logging.getLogger(__name__)
 
+# Colunas de resultado de processar_planilha e seus tipos
+COLUNAS_RESULTADO = {
+    'Total_Produtos_Encontrados': 'int64',
+    'Total_Produtos_Relevantes': 'int64',
+    'Termo_Otimizado': 'object',
+    'Palavras_Obrigatorias': 'object',
+    'Palavras_Opcionais': 'object',
+    'Preco_Minimo': 'float64',
+    'Preco_Maximo': 'float64',
+    'Preco_Medio': 'float64',
+    'Preco_Mediana': 'float64',
+    'Desvio_Padrao': 'float64',
+    'Outliers_Removidos': 'int64',
+    'Links_Produtos_JSON': 'object',
+    'Status_Busca': 'object',
+    'Data_Hora_Busca': 'object',
+    'Inalterado_Desde': 'object'
+}
+
+def valores_linha(resultado):
+    """Valores das COLUNAS_RESULTADO para o resultado da busca de um material"""
+    stats = resultado.get('estatisticas') or {}
+    return {
+        'Total_Produtos_Encontrados': resultado.get('total_encontrado', 0),
+        'Total_Produtos_Relevantes': resultado.get('total_relevante', 0),
+        'Termo_Otimizado': resultado.get('termo_otimizado', ''),
+        'Palavras_Obrigatorias': ', '.join(resultado.get('palavras_obrigatorias', [])),
+        'Palavras_Opcionais': ', '.join(resultado.get('palavras_opcionais', [])),
+        'Preco_Minimo': stats.get('preco_minimo', nan),
+        'Preco_Maximo': stats.get('preco_maximo', nan),
+        'Preco_Medio': stats.get('preco_medio', nan),
+        'Preco_Mediana': stats.get('preco_mediana', nan),
+        'Desvio_Padrao': stats.get('desvio_padrao', nan),
+        'Outliers_Removidos': stats.get('outliers_removidos', 0),
+        'Links_Produtos_JSON': produtos_para_json(resultado['produtos']),
+        'Status_Busca': resultado['status'],
+        'Data_Hora_Busca': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'Inalterado_Desde': resultado.get('inalterado_desde') or ''
+    }
+
 class BuscadorInteligente:
     """Busca flexível que confia no algoritmo do Mercado Livre"""
     
@@ -42,25 +87,39 @@ class BuscadorInteligente:
         'linha', 'modelo', 'serie', 'colecao'
     }
     
-    def __init__(self):
+    def __init__(self, medidor=None, transporte=None, politica=None, disjuntor=None, cache=None,
+                 catalogo=None, remocoes=None, modelo=None):
         self.base_url = "https://lista.mercadolivre.com.br"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # Pool keep-alive, compressão e timeouts (transporte.Transporte)
+        self.transporte = transporte or Transporte()
+        # Tentativas e backoff para falhas transitórias (tentativas.PoliticaTentativas)
+        self.politica = politica or PoliticaTentativas()
+        # Pausa global quando o site passa a bloquear (disjuntor.Disjuntor)
+        self.disjuntor = disjuntor or Disjuntor()
+        # Requisições condicionais e resultados reaproveitados (cache_buscas.CacheBuscas; None = sem cache)
+        self.cache = cache
+        # Um Produto por anúncio (ID MLB), compartilhado entre materiais (produto.CatalogoProdutos)
+        self.catalogo = catalogo if catalogo is not None else CatalogoProdutos()
+        # Produtos removidos pelos validadores: {material: frozenset de ids} (remocoes.py)
+        self.remocoes = remocoes or {}
+        self.total_removidos = 0
+        # Descarta produtos improváveis para o material (modelo_relevancia.ModeloRelevancia; None = mantém todos)
+        self.modelo = modelo
+        self.total_descartados = 0
         self.contador_requisicoes = 0
         self.tempo_base = 2
         self.tempo_pausa_longa = 30
+        # Tempos por etapa (metricas.MedidorTempos); MedidorNulo não mede nada
+        self.medidor = medidor or MedidorNulo()
         
     def otimizar_termo_busca(self, termo_original):
         """Otimiza termo identificando palavras importantes para pontuação"""
-        logger.info(f"📝 Otimizando: {termo_original}")
+        logger.info("📝 Otimizando: %s", termo_original, extra=DETALHE)
         
         # USA O TERMO COMPLETO (incluindo modalidade)
         termo_base = termo_original.strip()
         
-        logger.info(f"   ✅ Usando termo completo: '{termo_base}'")
+        logger.info("   ✅ Usando termo completo: '%s'", termo_base, extra=DETALHE)
         
         # Extrai palavras
         palavras = re.findall(r'\b\w+\b', termo_base.lower())
@@ -85,9 +144,9 @@ class BuscadorInteligente:
         todas_palavras = palavras_obrigatorias + palavras_opcionais
         termo_otimizado = ' '.join(todas_palavras[:5])
         
-        logger.info(f"   ✅ Termo: '{termo_otimizado}'")
-        logger.info(f"   🔵 IMPORTANTES: {palavras_obrigatorias}")
-        logger.info(f"   🟡 SECUNDÁRIAS: {palavras_opcionais}")
+        logger.info("   ✅ Termo: '%s'", termo_otimizado, extra=DETALHE)
+        logger.info("   🔵 IMPORTANTES: %s", palavras_obrigatorias, extra=DETALHE)
+        logger.info("   🟡 SECUNDÁRIAS: %s", palavras_opcionais, extra=DETALHE)
         
         return {
             'termo_otimizado': termo_otimizado,
@@ -125,103 +184,274 @@ class BuscadorInteligente:
         """
         Pontua produtos confiando no mecanismo de busca do Mercado Livre
         NOVA ABORDAGEM: Não elimina produtos, apenas ordena por relevância
+        (removidos pelos validadores e improváveis pelo modelo saem depois,
+        em _filtrar_resultado)
+        
+        Devolve ItemMaterial: o score é do material, o Produto é do catálogo.
         """
         produtos_pontuados = []
         
         for produto in produtos:
             score = self.calcular_score_relevancia(
-                produto['nome'],
+                produto.nome,
                 palavras_obrigatorias,
                 palavras_opcionais
             )
-            
-            produto['score_relevancia'] = score
-            produtos_pontuados.append(produto)
+            produtos_pontuados.append(ItemMaterial(produto, score))
         
         # Ordena por score (mas mantém todos)
-        produtos_pontuados.sort(key=lambda x: x['score_relevancia'], reverse=True)
+        produtos_pontuados.sort(key=lambda x: x.score_relevancia, reverse=True)
         
-        logger.info(f"   🎯 FILTRO FLEXÍVEL: {len(produtos)} produtos (todos mantidos, ordenados por relevância)")
-        logger.info(f"      Palavras buscadas: {palavras_obrigatorias + palavras_opcionais}")
+        logger.info("   🎯 FILTRO FLEXÍVEL: %d produtos (todos mantidos, ordenados por relevância)",
+                    len(produtos), extra=DETALHE)
+        logger.info("      Palavras buscadas: %s", palavras_obrigatorias + palavras_opcionais, extra=DETALHE)
         
         return produtos_pontuados
     
     def buscar_produtos_material(self, nome_material):
-        """Busca produtos usando mecanismo do ML e pontua por relevância"""
-        logger.info(f"🔍 Buscando: {nome_material}")
+        """
+        Busca produtos usando mecanismo do ML e pontua por relevância
         
-        try:
-            self.aplicar_temporizador()
-            
-            otimizacao = self.otimizar_termo_busca(nome_material)
-            termo_busca = otimizacao['termo_otimizado']
-            palavras_obrigatorias = otimizacao['palavras_obrigatorias']
-            palavras_opcionais = otimizacao['palavras_opcionais']
-            
-            url = f"{self.base_url}/{quote(termo_busca)}"
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
+        Falhas transitórias e limitação (429) são repetidas com backoff
+        (tentativas.PoliticaTentativas). Se ainda falhar, o resultado tem
+        status 'erro' e 'classe' com a classe da falha (ver tentativas.py).
+        """
+        logger.info("🔍 Buscando: %s", nome_material, extra=INICIO_MATERIAL)
+        
+        otimizacao = self.otimizar_termo_busca(nome_material)
+        removidos = self.remocoes.get(chave_material(nome_material))
+        tentativa = 0
+        
+        while True:
+            tentativa += 1
+            try:
+                resultado = self._buscar_uma_vez(otimizacao, removidos)
+                self.disjuntor.registrar(resultado['classe'])
+                resultado['tentativas'] = tentativa
+                return resultado
+            except FalhaBusca as falha:
+                self.disjuntor.registrar(falha.classe)
+                if self.politica.deve_repetir(falha, tentativa):
+                    espera = self.politica.espera(falha, tentativa)
+                    logger.warning("   ⚠️  %s (%s) - tentativa %d/%d, nova tentativa em %.1fs",
+                                   falha.classe, falha, tentativa, self.politica.max_tentativas, espera)
+                    with self.medidor.etapa('backoff'):
+                        time.sleep(espera)
+                    continue
+                logger.error("❌ Erro [%s]: %s", falha.classe, falha)
+                classe = falha.classe
+            except Exception as e:
+                logger.exception("❌ Erro inesperado: %s", e)
+                classe = INESPERADO
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            return {'total_encontrado': 0, 'status': 'erro', 'classe': classe,
+                    'tentativas': tentativa, 'produtos': []}
+    
+    def _buscar_uma_vez(self, otimizacao, removidos=None):
+        """Uma tentativa de busca (levanta FalhaBusca com a classe da falha)"""
+        medidor = self.medidor
+        termo_busca = otimizacao['termo_otimizado']
+        palavras_obrigatorias = otimizacao['palavras_obrigatorias']
+        palavras_opcionais = otimizacao['palavras_opcionais']
+        
+        with medidor.etapa('disjuntor'):
+            self.disjuntor.antes_da_requisicao()
+        with medidor.etapa('espera'):
+            self.aplicar_temporizador()
+        
+        url = f"{self.base_url}/{quote(termo_busca)}"
+        entrada = self.cache.obter(url) if self.cache else None
+        # O transporte registra 'conexao_ttfb' e 'download' no medidor
+        try:
+            resposta = self.transporte.get(url, headers=CacheBuscas.cabecalhos_condicionais(entrada),
+                                           medidor=medidor)
+        except ErroRede as e:
+            raise FalhaBusca(TRANSITORIO, str(e))
+        
+        if resposta.status_code == 304 and entrada:
+            self.cache.condicionais += 1
+            logger.info("   ♻️  Página não modificada (304) desde %s", entrada['inalterado_desde'], extra=DETALHE)
+            return self._resultado_do_cache(entrada, removidos, otimizacao['termo_original'])
+        
+        classe = classificar_status(resposta.status_code)
+        if classe:
+            retry_after = ler_retry_after(resposta.headers.get('Retry-After'))
+            if resposta.status_code == 503 and retry_after is not None:
+                classe = LIMITADO
+            raise FalhaBusca(classe, f"HTTP {resposta.status_code}", retry_after)
+        
+        with medidor.etapa('parse'):
+            soup = BeautifulSoup(resposta.conteudo, 'html.parser')
+        
+        with medidor.etapa('extracao'):
             produtos_brutos = []
             
             items = soup.find_all('li', class_='ui-search-layout__item')[:40]
+            vistos = set()
             
             for item in items:
-                produto = self.extrair_dados_produto(item, nome_material)
-                if produto:
-                    produtos_brutos.append(produto)
-            
-            logger.info(f"   📦 Produtos brutos: {len(produtos_brutos)}")
-            
-            # PONTUAÇÃO POR RELEVÂNCIA
+                produto = self.extrair_dados_produto(item)
+                # O mesmo anúncio pode aparecer duas vezes na listagem (patrocinado + orgânico)
+                if produto and produto.chave not in vistos:
+                    vistos.add(produto.chave)
+                    produtos_brutos.append(self.catalogo.registrar(produto))
+        
+        if not items:
+            if contem_assinatura(resposta.conteudo, ASSINATURAS_BLOQUEIO):
+                raise FalhaBusca(BLOQUEADO, "página de verificação/captcha")
+            if not contem_assinatura(resposta.conteudo, ASSINATURAS_SEM_RESULTADOS):
+                raise FalhaBusca(LAYOUT_ALTERADO, "nenhum item de listagem na página")
+        elif not produtos_brutos:
+            raise FalhaBusca(LAYOUT_ALTERADO, f"{len(items)} itens sem nome/preço reconhecíveis")
+        
+        logger.info("   📦 Produtos brutos: %d", len(produtos_brutos), extra=DETALHE)
+        
+        hash_resultado = None
+        if self.cache:
+            hash_resultado = hash_produtos(produtos_brutos)
+            if entrada and entrada['hash'] == hash_resultado:
+                self.cache.mesmo_hash += 1
+                logger.info("   ♻️  Mesmos produtos desde %s", entrada['inalterado_desde'], extra=DETALHE)
+                # Regrava para guardar ETag/Last-Modified novos
+                entrada = self.cache.salvar(url, resposta, hash_resultado, entrada['resultado'], entrada)
+                return self._resultado_do_cache(entrada, removidos, otimizacao['termo_original'])
+        
+        # PONTUAÇÃO POR RELEVÂNCIA
+        with medidor.etapa('score'):
             produtos = self.filtrar_produtos_relevantes(
                 produtos_brutos,
                 palavras_obrigatorias,
                 palavras_opcionais
             )
-            
-            if produtos:
-                logger.info(f"   🏆 Top 3:")
-                for i, p in enumerate(produtos[:3], 1):
-                    logger.info(f"      {i}. [{p['score_relevancia']:.2f}] {p['nome'][:60]}...")
-            
-            if produtos:
+        
+        if produtos:
+            logger.info("   🏆 Top 3:", extra=DETALHE)
+            for i, p in enumerate(produtos[:3], 1):
+                logger.info("      %d. [%.2f] %s...", i, p.score_relevancia, p.nome[:60], extra=DETALHE)
+        
+        if produtos:
+            with medidor.etapa('estatisticas'):
                 estatisticas = self.calcular_estatisticas(produtos)
-                links_json = json.dumps([
-                    {'nome': p['nome'], 'preco': p['preco'], 'link': p['link'],
-                     'score_relevancia': round(p.get('score_relevancia', 0), 2)}
-                    for p in produtos
-                ], ensure_ascii=False, indent=2)
-                
-                return {
-                    'total_encontrado': len(produtos_brutos),
-                    'total_relevante': len(produtos),
-                    'termo_otimizado': termo_busca,
-                    'palavras_obrigatorias': palavras_obrigatorias,
-                    'palavras_opcionais': palavras_opcionais,
-                    'estatisticas': estatisticas,
-                    'links_produtos': links_json,
-                    'produtos': produtos,
-                    'status': 'sucesso'
-                }
-            else:
-                return {
-                    'total_encontrado': len(produtos_brutos),
-                    'total_relevante': 0,
-                    'termo_otimizado': termo_busca,
-                    'estatisticas': None,
-                    'links_produtos': json.dumps([], ensure_ascii=False),
-                    'produtos': [],
-                    'status': 'nenhum_produto_relevante'
-                }
-                
-        except Exception as e:
-            logger.error(f"❌ Erro: {e}")
-            return {'total_encontrado': 0, 'status': 'erro', 'links_produtos': '[]', 'produtos': []}
+            
+            resultado = {
+                'total_encontrado': len(produtos_brutos),
+                'total_relevante': len(produtos),
+                'termo_otimizado': termo_busca,
+                'palavras_obrigatorias': palavras_obrigatorias,
+                'palavras_opcionais': palavras_opcionais,
+                'estatisticas': estatisticas,
+                'produtos': produtos,
+                'status': 'sucesso',
+                'classe': None
+            }
+        else:
+            resultado = {
+                'total_encontrado': len(produtos_brutos),
+                'total_relevante': 0,
+                'termo_otimizado': termo_busca,
+                'estatisticas': None,
+                'produtos': [],
+                'status': 'nenhum_produto_relevante',
+                'classe': VAZIO
+            }
+        
+        # O cache guarda o resultado antes das remoções e do modelo: --desfazer,
+        # --sem-remocoes, --sem-modelo e um novo treino valem já na próxima execução
+        if self.cache:
+            self.cache.alterados += 1
+            self.cache.salvar(url, resposta, hash_resultado, resultado, entrada)
+        
+        resultado['inalterado'] = False
+        resultado['inalterado_desde'] = None
+        return self._filtrar_resultado(resultado, removidos, otimizacao['termo_original'])
+    
+    def _resultado_do_cache(self, entrada, removidos=None, material=None):
+        """
+        Resultado guardado no cache, com os produtos trocados pelos do catálogo
+        e filtrado pelas remoções atuais (e pelo modelo atual)
+        """
+        resultado = self.cache.resultado_inalterado(entrada)
+        self.catalogo.registrar_itens(resultado['produtos'])
+        return self._filtrar_resultado(resultado, removidos, material)
+    
+    def _filtrar_resultado(self, resultado, removidos=None, material=None):
+        """
+        Tira do resultado os produtos removidos pelos validadores (e, com
+        material, os que o modelo descarta), recalculando as estatísticas
+        """
+        produtos = resultado['produtos']
+        if removidos:
+            produtos = self._sem_removidos(produtos, removidos)
+        if self.modelo and material:
+            produtos = self._sem_improvaveis(produtos, material)
+        if len(produtos) < len(resultado['produtos']):
+            resultado['produtos'] = produtos
+            resultado['total_relevante'] = len(produtos)
+            resultado['estatisticas'] = self.calcular_estatisticas(produtos)
+            if not produtos:
+                # Todos removidos pelos validadores/modelo não é página vazia (disjuntor)
+                resultado['status'] = 'nenhum_produto_relevante'
+                resultado['classe'] = None
+        return resultado
+    
+    def _sem_removidos(self, produtos, removidos):
+        """Produtos (ou itens) cujo id não está entre os removidos pelos validadores"""
+        restantes = [p for p in produtos if p.chave not in removidos]
+        if len(restantes) < len(produtos):
+            self.total_removidos += len(produtos) - len(restantes)
+            logger.info("   🚫 %d produtos removidos antes pelos validadores", len(produtos) - len(restantes),
+                        extra=DETALHE)
+        return restantes
     
-    def extrair_dados_produto(self, item, nome_material):
-        """Extrai dados do produto"""
+    def _sem_improvaveis(self, produtos, material):
+        """Produtos (ou itens) com probabilidade de ficar, segundo o modelo, acima do limiar"""
+        if not produtos:
+            return produtos
+        probabilidades = self.modelo.probabilidades(material, [p.nome for p in produtos])
+        restantes = [p for p, prob in zip(produtos, probabilidades) if prob >= self.modelo.limiar]
+        if len(restantes) < len(produtos):
+            self.total_descartados += len(produtos) - len(restantes)
+            logger.info("   🤖 %d produtos descartados pelo modelo de relevância", len(produtos) - len(restantes),
+                        extra=DETALHE)
+        return restantes
+    
+    def imprimir_resumo_catalogo(self):
+        """Produtos únicos no catálogo e quantas vezes um anúncio foi reaproveitado"""
+        if self.catalogo.repetidos:
+            print(f"🗂️  Catálogo: {len(self.catalogo)} produtos únicos "
+                  f"({self.catalogo.repetidos} aparições repetidas entre materiais)")
+        if self.total_removidos:
+            print(f"🚫 {self.total_removidos} produtos já removidos pelos validadores ficaram de fora")
+        if self.total_descartados:
+            print(f"🤖 {self.total_descartados} produtos descartados pelo modelo de relevância "
+                  f"(probabilidade < {self.modelo.limiar:.2f})")
+    
+    def buscar_adiados(self, fila):
+        """
+        Nova tentativa dos materiais adiados (tentativas.FilaAdiada)
+        
+        Chamada no fim da execução, após uma pausa longa; cada material é
+        medido de novo (linha JSONL com adiado=true).
+        Gera (chave, nome_material, resultado) para cada material da fila.
+        """
+        if not fila:
+            return
+        
+        classes = ', '.join(f"{classe}: {n}" for classe, n in fila.resumo().most_common())
+        logger.info("🔁 Repetindo %d materiais adiados (%s) após %ss", len(fila), classes, self.tempo_pausa_longa)
+        with self.medidor.etapa('backoff'):
+            time.sleep(self.tempo_pausa_longa)
+        
+        for chave, nome_material, _ in fila:
+            self.medidor.iniciar_material(nome_material)
+            resultado = self.buscar_produtos_material(nome_material)
+            self.medidor.finalizar_material(status=resultado['status'], classe=resultado.get('classe'),
+                                            tentativas=resultado.get('tentativas'),
+                                            produtos=len(resultado['produtos']), adiado=True)
+            yield chave, nome_material, resultado
+    
+    def extrair_dados_produto(self, item):
+        """Extrai dados do produto (Produto ou None)"""
         try:
             nome_element = item.find('h2', class_='ui-search-item__title')
             if not nome_element:
@@ -252,22 +482,16 @@ class BuscadorInteligente:
             loja_element = item.find('p', class_='ui-search-official-store-item__subtitle')
             loja = loja_element.get_text().strip() if loja_element else "Vendedor não identificado"
             
-            return {
-                'nome': nome,
-                'preco': preco,
-                'link': link,
-                'imagem': imagem,
-                'loja': loja,
-                'material_buscado': nome_material
-            }
-        except:
+            return Produto(nome, preco, link, imagem, loja)
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.debug("   Item ignorado (%s: %s)", type(e).__name__, e)
             return None
     
     def calcular_estatisticas(self, produtos):
         """Calcula estatísticas"""
         if not produtos:
             return None
-        precos = [p['preco'] for p in produtos if p['preco'] > 0]
+        precos = [p.preco for p in produtos if p.preco > 0]
         if not precos:
             return None
         try:
@@ -301,6 +525,8 @@ class BuscadorInteligente:
     
     def processar_planilha(self, arquivo_entrada, arquivo_saida=None):
         """Processa planilha com FILTRO FLEXÍVEL"""
+        import pandas as pd
+        
         if arquivo_saida is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             arquivo_saida = f"materiais_flexivel_{timestamp}.xlsx"
@@ -309,56 +535,59 @@ class BuscadorInteligente:
         logger.info(f"🎯 MODO FLEXÍVEL: Confia no mecanismo do Mercado Livre")
         
         try:
-            df = pd.read_excel(arquivo_entrada)
+            df = ler_tabela(arquivo_entrada)
             if 'Nome' not in df.columns:
                 raise ValueError("Planilha deve ter 'Nome'")
             
-            df['Total_Produtos_Encontrados'] = 0
-            df['Total_Produtos_Relevantes'] = 0
-            df['Termo_Otimizado'] = ''
-            df['Palavras_Obrigatorias'] = ''
-            df['Palavras_Opcionais'] = ''
-            df['Preco_Minimo'] = None
-            df['Preco_Maximo'] = None
-            df['Preco_Medio'] = None
-            df['Preco_Mediana'] = None
-            df['Desvio_Padrao'] = None
-            df['Outliers_Removidos'] = 0
-            df['Links_Produtos_JSON'] = ''
-            df['Status_Busca'] = ''
-            df['Data_Hora_Busca'] = ''
+            # Buffers por coluna (montados em um DataFrame só no final)
+            colunas = {coluna: [] for coluna in COLUNAS_RESULTADO}
+            nomes = df['Nome'].astype(str).str.strip().tolist()
+            total = len(nomes)
+            
+            fila = FilaAdiada()
             
-            for idx, row in df.iterrows():
-                nome_material = str(row['Nome']).strip()
-                logger.info(f"🔄 {idx + 1}/{len(df)}: {nome_material}")
+            for posicao, nome_material in enumerate(nomes):
+                if logger.isEnabledFor(logging.INFO):
+                    # indicador() só é montado se a mensagem for exibida
+                    logger.info("🔄 %d/%d: %s%s", posicao + 1, total, nome_material, self.disjuntor.indicador())
                 
+                self.medidor.iniciar_material(nome_material)
                 resultado = self.buscar_produtos_material(nome_material)
+                self.medidor.finalizar_material(status=resultado['status'], classe=resultado.get('classe'),
+                                                tentativas=resultado.get('tentativas'),
+                                                produtos=len(resultado['produtos']))
+                fila.adiar_se_falhou(posicao, nome_material, resultado)
                 
-                df.at[idx, 'Total_Produtos_Encontrados'] = resultado.get('total_encontrado', 0)
-                df.at[idx, 'Total_Produtos_Relevantes'] = resultado.get('total_relevante', 0)
-                df.at[idx, 'Termo_Otimizado'] = resultado.get('termo_otimizado', '')
-                df.at[idx, 'Palavras_Obrigatorias'] = ', '.join(resultado.get('palavras_obrigatorias', []))
-                df.at[idx, 'Palavras_Opcionais'] = ', '.join(resultado.get('palavras_opcionais', []))
-                df.at[idx, 'Links_Produtos_JSON'] = resultado['links_produtos']
-                df.at[idx, 'Status_Busca'] = resultado['status']
-                df.at[idx, 'Data_Hora_Busca'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                if resultado.get('estatisticas'):
-                    stats = resultado['estatisticas']
-                    df.at[idx, 'Preco_Minimo'] = stats['preco_minimo']
-                    df.at[idx, 'Preco_Maximo'] = stats['preco_maximo']
-                    df.at[idx, 'Preco_Medio'] = stats['preco_medio']
-                    df.at[idx, 'Preco_Mediana'] = stats['preco_mediana']
-                    df.at[idx, 'Desvio_Padrao'] = stats['desvio_padrao']
-                    df.at[idx, 'Outliers_Removidos'] = stats['outliers_removidos']
+                for coluna, valor in valores_linha(resultado).items():
+                    colunas[coluna].append(valor)
+            
+            # Materiais adiados: nova tentativa no fim, substituindo a linha
+            for posicao, nome_material, resultado in self.buscar_adiados(fila):
+                logger.info("🔁 %d/%d: %s → %s", posicao + 1, total, nome_material, resultado['status'])
+                for coluna, valor in valores_linha(resultado).items():
+                    colunas[coluna][posicao] = valor
+            
+            resultados = pd.DataFrame(
+                {coluna: pd.Series(valores, index=df.index, dtype=COLUNAS_RESULTADO[coluna])
+                 for coluna, valores in colunas.items()}
+            )
+            df = pd.concat([df.drop(columns=list(COLUNAS_RESULTADO), errors='ignore'), resultados], axis=1)
             
             logger.info(f"💾 Salvando: {arquivo_saida}")
-            df.to_excel(arquivo_saida, index=False)
+            salvar_tabela(df, arquivo_saida)
             logger.info(f"🎉 Concluído!")
+            self.medidor.imprimir_resumo()
+            self.transporte.imprimir_resumo()
+            self.disjuntor.imprimir_resumo()
+            if self.cache:
+                self.cache.imprimir_resumo()
+            self.imprimir_resumo_catalogo()
             return df
         except Exception as e:
             logger.error(f"❌ Erro: {e}")
             raise
+        finally:
+            self.medidor.fechar()
 
 def main():
     import argparse
@@ -384,14 +613,32 @@ Exemplo:
 
 Uso:
   python3 busca_materiais_planilha_inteligente.py
+  python3 busca_materiais_planilha_inteligente.py --entrada output/partes/materiais_parte_1.json --saida parte_1.pkl
+
+Formatos (pela extensão): .xlsx, .pkl, .parquet e partes .json (só entrada)
         """
     )
     parser.add_argument('--entrada', default='materiais.xlsx')
-    parser.add_argument('--saida', help='Arquivo de saída')
+    parser.add_argument('--saida', help='Arquivo de saída (.xlsx, .pkl ou .parquet)')
+    parser.add_argument('--tempos', help='JSONL com tempos por etapa (padrão: output/logs/tempos_<data>.jsonl)')
+    parser.add_argument('--sem-cache', action='store_true',
+                        help='Não usar o cache de buscas (requisições condicionais e resultados inalterados)')
+    parser.add_argument('--sem-remocoes', action='store_true',
+                        help=f'Não aplicar as remoções dos validadores ({ARQUIVO_REMOCOES_PADRAO})')
+    parser.add_argument('--sem-modelo', action='store_true',
+                        help=f'Não descartar produtos pelo modelo de relevância ({ARQUIVO_MODELO_PADRAO})')
+    adicionar_argumentos_log(parser)
+    adicionar_argumentos_transporte(parser)
     args = parser.parse_args()
     
+    configurar_logging_args(args)
+    
     logger.info("🚀 MODO FLEXÍVEL - Confia no Mercado Livre")
-    buscador = BuscadorInteligente()
+    buscador = BuscadorInteligente(medidor=MedidorTempos(args.tempos or arquivo_tempos_padrao()),
+                                   transporte=Transporte(**opcoes_transporte_args(args)),
+                                   cache=None if args.sem_cache else CacheBuscas(),
+                                   remocoes=None if args.sem_remocoes else removidos_por_material(carregar_remocoes()),
+                                   modelo=None if args.sem_modelo else ModeloRelevancia.carregar())
     
     try:
         buscador.processar_planilha(args.entrada, args.saida)
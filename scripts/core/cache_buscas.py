@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache das buscas para atualizações de preço
+
+Para cada URL de busca guarda ETag/Last-Modified da resposta, o hash
+normalizado da lista de produtos extraída e o resultado já pontuado.
+Na atualização seguinte:
+  - a requisição é condicional (If-None-Match / If-Modified-Since);
+    304 → resultado anterior, sem download, parse nem pontuação
+  - 200 com o mesmo hash de produtos → resultado anterior, sem pontuação
+    nem estatísticas
+Nos dois casos o material é marcado como inalterado desde a data em que o
+hash mudou pela última vez.
+
+Uma entrada por arquivo (output/cache/buscas/<ab>/<sha1>.pkl), gravada de
+forma atômica: várias partes podem rodar ao mesmo tempo.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+from datetime import datetime
+
+PASTA_CACHE_BUSCAS = 'output/cache/buscas'
+
+# Muda quando o formato do resultado guardado muda; entradas de outra versão são ignoradas
+VERSAO_CACHE = 4
+
+
+def normalizar_link(link):
+    """Link sem query string e fragmento (parâmetros de rastreamento mudam a cada busca)"""
+    return re.split(r'[?#]', link or '', maxsplit=1)[0]
+
+
+def hash_produtos(produtos):
+    """Hash da lista extraída (nome, preço e link normalizados; ordem não importa)"""
+    linhas = sorted(
+        f"{' '.join(p.nome.lower().split())}|{p.preco:.2f}|{normalizar_link(p.link)}"
+        for p in produtos
+    )
+    return hashlib.sha1('\n'.join(linhas).encode('utf-8')).hexdigest()
+
+
+class CacheBuscas:
+    """Entradas do cache por URL de busca"""
+
+    def __init__(self, pasta=PASTA_CACHE_BUSCAS):
+        self.pasta = pasta
+        self.condicionais = 0   # respostas 304
+        self.mesmo_hash = 0     # respostas 200 com os mesmos produtos
+        self.alterados = 0      # respostas com produtos novos ou diferentes
+
+    def _caminho(self, url):
+        chave = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.pasta, chave[:2], f'{chave}.pkl')
+
+    def obter(self, url):
+        """Entrada da URL (dict) ou None"""
+        try:
+            with open(self._caminho(url), 'rb') as f:
+                entrada = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+            # AttributeError/TypeError: objetos gravados com outra versão das classes
+            return None
+        return entrada if entrada.get('versao') == VERSAO_CACHE else None
+
+    @staticmethod
+    def cabecalhos_condicionais(entrada):
+        """If-None-Match / If-Modified-Since a partir da entrada (ou None)"""
+        if not entrada:
+            return None
+        headers = {}
+        if entrada.get('etag'):
+            headers['If-None-Match'] = entrada['etag']
+        if entrada.get('last_modified'):
+            headers['If-Modified-Since'] = entrada['last_modified']
+        return headers or None
+
+    def salvar(self, url, resposta, hash_resultado, resultado, entrada_anterior=None):
+        """
+        Grava a entrada da URL
+
+        inalterado_desde só avança quando o hash dos produtos muda.
+        """
+        agora = datetime.now().isoformat(timespec='seconds')
+        inalterado_desde = agora
+        if entrada_anterior and entrada_anterior.get('hash') == hash_resultado:
+            inalterado_desde = entrada_anterior.get('inalterado_desde', agora)
+
+        entrada = {
+            'versao': VERSAO_CACHE,
+            'url': url,
+            'etag': resposta.headers.get('ETag'),
+            'last_modified': resposta.headers.get('Last-Modified'),
+            'hash': hash_resultado,
+            'inalterado_desde': inalterado_desde,
+            'verificado_em': agora,
+            'resultado': {chave: valor for chave, valor in resultado.items()
+                          if chave not in ('tentativas', 'inalterado', 'inalterado_desde')}
+        }
+
+        caminho = self._caminho(url)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f'{caminho}.{os.getpid()}.tmp'
+        with open(temporario, 'wb') as f:
+            pickle.dump(entrada, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+        return entrada
+
+    def resultado_inalterado(self, entrada):
+        """Cópia do resultado guardado, marcada como inalterada"""
+        resultado = dict(entrada['resultado'])
+        resultado['inalterado'] = True
+        resultado['inalterado_desde'] = entrada['inalterado_desde']
+        return resultado
+
+    def imprimir_resumo(self):
+        """Quantas buscas foram reaproveitadas"""
+        total = self.condicionais + self.mesmo_hash + self.alterados
+        if total:
+            print(f"♻️  Cache de buscas: {self.condicionais} não modificadas (304), "
+                  f"{self.mesmo_hash} com os mesmos produtos, {self.alterados} atualizadas")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Configuração de logging não bloqueante (QueueHandler + QueueListener)
+
+Os módulos só obtêm seus loggers; quem configura a saída são os scripts de
+entrada, chamando configurar_logging(). As mensagens vão para uma fila em
+memória e uma thread separada grava no arquivo e no console, então a busca
+não espera pela escrita em disco.
+
+Níveis de detalhe:
+  detalhado   todas as mensagens de cada material (padrão)
+  amostrado   detalhes de 1 a cada N materiais (1 a cada 10, se não indicado)
+  resumido    só uma linha por material, avisos e erros
+
+Formatos:
+  texto       "data - NÍVEL - mensagem" (formato original)
+  compacto    uma linha JSON por mensagem: {"ts", "nivel", "logger", "msg"}
+              (e "exc" com o traceback, quando houver)
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+ARQUIVO_LOG_PADRAO = 'output/logs/busca_materiais_inteligente.log'
+
+NIVEIS_DETALHE = ('detalhado', 'amostrado', 'resumido')
+FORMATOS_LOG = ('texto', 'compacto')
+AMOSTRAGEM_PADRAO = 10
+
+# extra= das mensagens de detalhe por material e da mensagem que inicia um material
+DETALHE = {'detalhe': True}
+INICIO_MATERIAL = {'inicio_material': True}
+
+_listener = None
+
+
+class FiltroDetalhe(logging.Filter):
+    """Deixa passar os detalhes por material conforme o nível de detalhe"""
+
+    def __init__(self, nivel_detalhe='detalhado', amostragem=AMOSTRAGEM_PADRAO):
+        super().__init__()
+        self.nivel_detalhe = nivel_detalhe
+        self.amostragem = max(1, amostragem)
+        self._materiais = 0
+        self._material_amostrado = True
+
+    def filter(self, record):
+        if getattr(record, 'inicio_material', False):
+            self._materiais += 1
+            self._material_amostrado = (self._materiais - 1) % self.amostragem == 0
+
+        if not getattr(record, 'detalhe', False):
+            return True
+        if self.nivel_detalhe == 'detalhado':
+            return True
+        if self.nivel_detalhe == 'resumido':
+            return False
+        return self._material_amostrado
+
+
+class FormatadorCompacto(logging.Formatter):
+    """Uma linha JSON por mensagem"""
+
+    def format(self, record):
+        registro = {
+            'ts': round(record.created, 3),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage().strip()
+        }
+        if record.exc_text:
+            registro['exc'] = record.exc_text
+        return json.dumps(registro, ensure_ascii=False)
+
+
+class HandlerFila(logging.handlers.QueueHandler):
+    """
+    QueueHandler que mantém o traceback separado da mensagem
+
+    O prepare() padrão junta o traceback ao texto e apaga exc_info antes de
+    o registro chegar ao listener; aqui ele vai formatado em exc_text, que o
+    Formatter de texto acrescenta à linha e o FormatadorCompacto grava em "exc".
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configurar_logging(arquivo_log=ARQUIVO_LOG_PADRAO, nivel_detalhe='detalhado',
+                       formato='texto', amostragem=AMOSTRAGEM_PADRAO, console=True):
+    """
+    Configura o logger raiz com uma fila e uma thread de escrita
+
+    Pode ser chamada de novo para trocar a configuração.
+    Retorna o QueueListener (parado automaticamente ao sair).
+    """
+    global _listener
+
+    if nivel_detalhe not in NIVEIS_DETALHE:
+        raise ValueError(f"Nível de detalhe inválido: {nivel_detalhe} (use {', '.join(NIVEIS_DETALHE)})")
+    if formato not in FORMATOS_LOG:
+        raise ValueError(f"Formato de log inválido: {formato} (use {', '.join(FORMATOS_LOG)})")
+
+    encerrar_logging()
+
+    if formato == 'compacto':
+        formatador = FormatadorCompacto()
+    else:
+        formatador = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    handlers = []
+    if arquivo_log:
+        pasta = os.path.dirname(arquivo_log)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        handlers.append(logging.FileHandler(arquivo_log, encoding='utf-8'))
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatador)
+
+    fila = queue.SimpleQueue()
+    handler_fila = HandlerFila(fila)
+    handler_fila.addFilter(FiltroDetalhe(nivel_detalhe, amostragem))
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(handler_fila)
+    raiz.setLevel(logging.INFO)
+
+    _listener = logging.handlers.QueueListener(fila, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def encerrar_logging():
+    """Esvazia a fila e para a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def adicionar_argumentos_log(parser):
+    """Adiciona --log-detalhe, --log-formato e --log-amostragem a um argparse"""
+    parser.add_argument('--log-detalhe', choices=NIVEIS_DETALHE, default='detalhado',
+                        help=f'Detalhe do log por material (padrão: detalhado; amostrado: 1 a cada '
+                             f'{AMOSTRAGEM_PADRAO}, resumido: uma linha)')
+    parser.add_argument('--log-formato', choices=FORMATOS_LOG, default='texto',
+                        help='Formato do log: texto ou compacto (JSON por linha)')
+    parser.add_argument('--log-amostragem', type=int, default=AMOSTRAGEM_PADRAO, metavar='N',
+                        help=f'No modo amostrado, detalhar 1 a cada N materiais (padrão: {AMOSTRAGEM_PADRAO})')
+
+
+def configurar_logging_args(args, arquivo_log=ARQUIVO_LOG_PADRAO, console=True):
+    """configurar_logging() a partir dos argumentos de adicionar_argumentos_log()"""
+    return configurar_logging(arquivo_log, args.log_detalhe, args.log_formato,
+                              args.log_amostragem, console)
+
+
+atexit.register(encerrar_logging)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Disjuntor (circuit breaker) das buscas no Mercado Livre
+
+Quando o site passa a responder com captcha, 403/429 ou páginas sem itens,
+continuar buscando só gera resultados vazios. O disjuntor acompanha o
+resultado de cada requisição e:
+
+  fechado     normal; conta bloqueios e páginas sem itens seguidos
+  aberto      limite atingido: todas as buscas esperam o fim da pausa
+  sondando    pausa acabou: uma requisição de teste decide se volta a
+              'fechado' ou se abre de novo com pausa maior (x2, até o teto);
+              uma busca sem resultados não decide, a próxima sonda de novo
+"""
+
+import logging
+import time
+
+from tentativas import BLOQUEADO, LAYOUT_ALTERADO, LIMITADO, TRANSITORIO, VAZIO
+
+logger = logging.getLogger(__name__)
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+SONDANDO = 'sondando'
+
+# Sinais de bloqueio e de páginas sem itens
+CLASSES_BLOQUEIO = frozenset({BLOQUEADO, LIMITADO, TRANSITORIO})
+CLASSES_SEM_ITENS = frozenset({VAZIO, LAYOUT_ALTERADO})
+
+
+class Disjuntor:
+    """Pausa global das buscas após bloqueios ou páginas vazias em sequência"""
+
+    def __init__(self, limite_bloqueios=3, limite_sem_itens=10,
+                 pausa_inicial=60.0, pausa_maxima=900.0, fator=2.0):
+        self.limite_bloqueios = limite_bloqueios
+        self.limite_sem_itens = limite_sem_itens
+        self.pausa_inicial = pausa_inicial
+        self.pausa_maxima = pausa_maxima
+        self.fator = fator
+
+        self.estado = FECHADO
+        self.bloqueios_seguidos = 0
+        self.sem_itens_seguidos = 0
+        self.pausa = pausa_inicial
+        self.reabre_em = None
+        self.aberturas = 0
+        self.tempo_pausado = 0.0
+
+    def antes_da_requisicao(self):
+        """Espera o fim da pausa se o disjuntor estiver aberto (a requisição seguinte é a sonda)"""
+        if self.estado != ABERTO:
+            return
+        restante = self.reabre_em - time.monotonic()
+        if restante > 0:
+            logger.warning("⏸️  Disjuntor aberto: aguardando %.0fs antes de sondar", restante)
+            time.sleep(restante)
+            self.tempo_pausado += restante
+        self.estado = SONDANDO
+        logger.info("🟡 Disjuntor sondando: testando uma requisição")
+
+    def registrar(self, classe):
+        """Resultado da requisição: None (produtos encontrados) ou a classe da falha/vazio"""
+        if classe in CLASSES_BLOQUEIO:
+            self.bloqueios_seguidos += 1
+        elif classe in CLASSES_SEM_ITENS:
+            self.sem_itens_seguidos += 1
+        else:
+            self.bloqueios_seguidos = 0
+            self.sem_itens_seguidos = 0
+            if self.estado == SONDANDO:
+                logger.info("🟢 Disjuntor fechado: buscas normalizadas")
+                self.estado = FECHADO
+                self.pausa = self.pausa_inicial
+            return
+
+        if self.estado == SONDANDO and classe == VAZIO:
+            # Busca sem resultados é uma página normal, mas não prova que os itens voltaram
+            return
+        if self.estado == SONDANDO:
+            self.pausa = min(self.pausa * self.fator, self.pausa_maxima)
+            self._abrir(f"sonda falhou ({classe})")
+        elif self.bloqueios_seguidos >= self.limite_bloqueios:
+            self._abrir(f"{self.bloqueios_seguidos} bloqueios seguidos ({classe})")
+        elif self.sem_itens_seguidos >= self.limite_sem_itens:
+            self._abrir(f"{self.sem_itens_seguidos} páginas sem itens seguidas")
+
+    def _abrir(self, motivo):
+        self.estado = ABERTO
+        self.aberturas += 1
+        self.reabre_em = time.monotonic() + self.pausa
+        self.bloqueios_seguidos = 0
+        self.sem_itens_seguidos = 0
+        logger.warning("🔴 Disjuntor aberto: %s - pausa de %.0fs", motivo, self.pausa)
+
+    def indicador(self):
+        """Texto curto do estado para a linha de progresso ('' quando fechado)"""
+        if self.estado == ABERTO:
+            restante = max(0, self.reabre_em - time.monotonic())
+            return f" 🔴 pausado ({restante:.0f}s)"
+        if self.estado == SONDANDO:
+            return " 🟡 sondando"
+        return ''
+
+    def imprimir_resumo(self):
+        """Quantas vezes abriu e quanto tempo ficou pausado"""
+        if self.aberturas:
+            print(f"🔌 Disjuntor abriu {self.aberturas}x, {self.tempo_pausado / 60:.1f} min em pausa "
+                  f"(estado final: {self.estado})")
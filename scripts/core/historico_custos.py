@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Histórico de custo por material (tempo de busca e nº de produtos)
+Alimentado a cada processamento e usado para balancear a divisão em partes
+
+Partes processadas em paralelo gravam no mesmo arquivo: registrar_custos
+relê e atualiza o histórico sob uma trava entre processos, para uma parte
+não apagar as atualizações das outras.
+"""
+
+import json
+import os
+import statistics
+from contextlib import contextmanager
+
+ARQUIVO_CUSTOS_PADRAO = 'output/logs/custos_materiais.json'
+
+# Peso (em segundos) de cada produto retornado: produtos a mais
+# custam pontuação, renderização e tempo de validação manual
+PESO_POR_PRODUTO = 0.05
+
+# Custo assumido quando ainda não há histórico nenhum
+CUSTO_PADRAO = 1.0
+
+# Fator da média móvel exponencial (peso da execução mais recente)
+ALFA_MEDIA_MOVEL = 0.5
+
+
+def chave_material(nome_material):
+    """Chave usada no histórico (nome sem espaços extras)"""
+    return ' '.join(str(nome_material).split())
+
+
+def carregar_custos(arquivo=ARQUIVO_CUSTOS_PADRAO):
+    """Carrega histórico de custos (dicionário vazio se não existir)"""
+    if not os.path.exists(arquivo):
+        return {}
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def salvar_custos(custos, arquivo=ARQUIVO_CUSTOS_PADRAO):
+    """Salva histórico de custos"""
+    pasta = os.path.dirname(arquivo)
+    if pasta and not os.path.exists(pasta):
+        os.makedirs(pasta)
+    temporario = arquivo + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(custos, f, ensure_ascii=False)
+    os.replace(temporario, arquivo)
+
+
+@contextmanager
+def trava_arquivo(arquivo):
+    """Trava exclusiva entre processos (arquivo.lock) para ler, alterar e gravar arquivo"""
+    pasta = os.path.dirname(arquivo)
+    if pasta and not os.path.exists(pasta):
+        os.makedirs(pasta, exist_ok=True)
+    with open(arquivo + '.lock', 'a+') as trava:
+        if os.name == 'nt':
+            import msvcrt
+            trava.seek(0)
+            # LK_LOCK tenta por ~10s; repete até conseguir
+            while True:
+                try:
+                    msvcrt.locking(trava.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                trava.seek(0)
+                msvcrt.locking(trava.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+
+
+def registrar_custos(medicoes, arquivo=ARQUIVO_CUSTOS_PADRAO):
+    """
+    Aplica as medições [(material, tempo, produtos), ...] ao histórico do arquivo
+
+    O arquivo é relido sob trava_arquivo: as médias móveis partem do que
+    outras partes já gravaram e só os materiais medidos mudam.
+    """
+    if not medicoes:
+        return
+    with trava_arquivo(arquivo):
+        custos = carregar_custos(arquivo)
+        for nome_material, tempo, total_produtos in medicoes:
+            registrar_custo(custos, nome_material, tempo, total_produtos)
+        salvar_custos(custos, arquivo)
+
+
+def registrar_custo(custos, nome_material, tempo, total_produtos):
+    """Atualiza o histórico de um material com a média móvel da execução atual"""
+    chave = chave_material(nome_material)
+    anterior = custos.get(chave)
+
+    if anterior is None:
+        custos[chave] = {
+            'tempo': tempo,
+            'produtos': total_produtos,
+            'execucoes': 1
+        }
+    else:
+        anterior['tempo'] = ALFA_MEDIA_MOVEL * tempo + (1 - ALFA_MEDIA_MOVEL) * anterior['tempo']
+        anterior['produtos'] = ALFA_MEDIA_MOVEL * total_produtos + (1 - ALFA_MEDIA_MOVEL) * anterior['produtos']
+        anterior['execucoes'] += 1
+
+    return custos[chave]
+
+
+def custo_registro(registro):
+    """Custo estimado (segundos) de um registro do histórico"""
+    return registro['tempo'] + PESO_POR_PRODUTO * registro['produtos']
+
+
+def estimar_custos(nomes_materiais, custos):
+    """
+    Estima o custo de cada material
+
+    Materiais sem histórico recebem a mediana dos custos conhecidos,
+    ou CUSTO_PADRAO se nenhum material tiver histórico.
+    Retorna (lista de custos, quantidade de materiais com histórico)
+    """
+    conhecidos = {}
+    for nome in nomes_materiais:
+        registro = custos.get(chave_material(nome))
+        if registro:
+            conhecidos[nome] = custo_registro(registro)
+
+    padrao = statistics.median(conhecidos.values()) if conhecidos else CUSTO_PADRAO
+
+    estimativas = [conhecidos.get(nome, padrao) for nome in nomes_materiais]
+    return estimativas, len(conhecidos)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Histórico de preços (SQLite, só acrescenta)
+
+Cada processamento de uma parte vira uma execução; para cada material são
+guardadas as estatísticas calculadas e o preço de cada produto. Nada é
+sobrescrito, então dá para ver quando a mediana de um material mudou sem
+buscar de novo.
+
+Tabelas:
+  execucoes       id, iniciada_em, origem, parte
+  estatisticas    material × execução: status, nº de produtos, mín/máx/média/mediana/DP
+  precos          material × execução × produto: nome, link, preço
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+from historico_custos import chave_material
+
+ARQUIVO_HISTORICO_PADRAO = 'output/historico/precos.sqlite'
+
+# Variação da mediana (%) a partir da qual o material aparece como alterado
+LIMIAR_VARIACAO_PADRAO = 5.0
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    id          INTEGER PRIMARY KEY,
+    iniciada_em TEXT NOT NULL,
+    origem      TEXT,
+    parte       INTEGER
+);
+CREATE TABLE IF NOT EXISTS estatisticas (
+    execucao_id    INTEGER NOT NULL REFERENCES execucoes(id),
+    material       TEXT NOT NULL,
+    nome           TEXT NOT NULL,
+    status         TEXT NOT NULL,
+    total_produtos INTEGER NOT NULL,
+    preco_minimo   REAL,
+    preco_maximo   REAL,
+    preco_medio    REAL,
+    preco_mediana  REAL,
+    desvio_padrao  REAL,
+    inalterado     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (material, execucao_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_estatisticas_execucao ON estatisticas (execucao_id);
+CREATE TABLE IF NOT EXISTS precos (
+    execucao_id INTEGER NOT NULL REFERENCES execucoes(id),
+    material    TEXT NOT NULL,
+    nome        TEXT NOT NULL,
+    link        TEXT,
+    preco       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_precos_material ON precos (material, execucao_id);
+"""
+
+# Última e penúltima execução de cada material (só buscas sem erro)
+_ULTIMAS_DUAS = """
+SELECT material, nome, execucao_id, preco_mediana, total_produtos,
+       ROW_NUMBER() OVER (PARTITION BY material ORDER BY execucao_id DESC) AS ordem
+FROM estatisticas
+WHERE status != 'erro'
+"""
+
+
+class HistoricoPrecos:
+    """Acesso ao histórico de preços"""
+
+    def __init__(self, arquivo=ARQUIVO_HISTORICO_PADRAO):
+        self.arquivo = arquivo
+        pasta = os.path.dirname(arquivo)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        # timeout: partes processadas em paralelo esperam a escrita uma da outra
+        self.conexao = sqlite3.connect(arquivo, timeout=30)
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.executescript(ESQUEMA)
+
+    def registrar_execucao(self, materiais, origem=None, parte=None):
+        """
+        Grava uma execução e devolve seu id
+
+        materiais: lista de (nome_material, resultado) com o resultado de
+        buscar_produtos_material. Tudo numa transação só.
+        """
+        with self.conexao:
+            cursor = self.conexao.execute(
+                'INSERT INTO execucoes (iniciada_em, origem, parte) VALUES (?, ?, ?)',
+                (datetime.now().isoformat(timespec='seconds'), origem, parte)
+            )
+            execucao_id = cursor.lastrowid
+
+            linhas_estatisticas = []
+            linhas_precos = []
+            for nome_material, resultado in materiais:
+                chave = chave_material(nome_material)
+                stats = resultado.get('estatisticas') or {}
+                produtos = resultado.get('produtos') or []
+                linhas_estatisticas.append((
+                    execucao_id, chave, nome_material, resultado.get('status', 'erro'), len(produtos),
+                    stats.get('preco_minimo'), stats.get('preco_maximo'), stats.get('preco_medio'),
+                    stats.get('preco_mediana'), stats.get('desvio_padrao'),
+                    int(bool(resultado.get('inalterado')))
+                ))
+                linhas_precos.extend(
+                    (execucao_id, chave, p.nome, p.link, p.preco) for p in produtos
+                )
+
+            # OR REPLACE: o mesmo material duas vezes na parte fica com a última busca
+            self.conexao.executemany(
+                'INSERT OR REPLACE INTO estatisticas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                linhas_estatisticas
+            )
+            self.conexao.executemany('INSERT INTO precos VALUES (?, ?, ?, ?, ?)', linhas_precos)
+
+        return execucao_id
+
+    def ultimos_por_material(self):
+        """Estatísticas mais recentes (sem erro) de cada material"""
+        return self.conexao.execute("""
+            SELECT e.*, x.iniciada_em
+            FROM (
+                SELECT material, MAX(execucao_id) AS execucao_id
+                FROM estatisticas WHERE status != 'erro' GROUP BY material
+            ) u
+            JOIN estatisticas e USING (material, execucao_id)
+            JOIN execucoes x ON x.id = e.execucao_id
+            ORDER BY e.nome
+        """).fetchall()
+
+    def variacoes(self, limiar=LIMIAR_VARIACAO_PADRAO, execucao_id=None):
+        """
+        Materiais cuja mediana variou ao menos limiar % entre as duas últimas execuções
+
+        Com execucao_id, só os materiais cuja última execução é essa.
+        Devolve dicts com material, nome, anterior, atual e percentual, maior variação primeiro.
+        """
+        linhas = self.conexao.execute(f"""
+            WITH ordenadas AS ({_ULTIMAS_DUAS})
+            SELECT a.material, a.nome, a.execucao_id,
+                   b.preco_mediana AS anterior, a.preco_mediana AS atual,
+                   (a.preco_mediana - b.preco_mediana) * 100.0 / b.preco_mediana AS percentual
+            FROM ordenadas a
+            JOIN ordenadas b ON b.material = a.material AND b.ordem = 2
+            WHERE a.ordem = 1
+              AND a.preco_mediana IS NOT NULL AND b.preco_mediana > 0
+              AND ABS(a.preco_mediana - b.preco_mediana) * 100.0 / b.preco_mediana >= ?
+              AND (? IS NULL OR a.execucao_id = ?)
+            ORDER BY ABS(percentual) DESC
+        """, (limiar, execucao_id, execucao_id)).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def serie_material(self, nome_material):
+        """Mediana e nº de produtos do material em cada execução (mais antiga primeiro)"""
+        return self.conexao.execute("""
+            SELECT x.iniciada_em, e.status, e.total_produtos, e.preco_mediana, e.inalterado
+            FROM estatisticas e JOIN execucoes x ON x.id = e.execucao_id
+            WHERE e.material = ?
+            ORDER BY e.execucao_id
+        """, (chave_material(nome_material),)).fetchall()
+
+    def fechar(self):
+        self.conexao.close()
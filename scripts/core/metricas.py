@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Medição de tempo por etapa de cada material
+
+Cada material gera uma linha JSONL com a duração (segundos, relógio
+monotônico) de cada etapa; ao final é impresso um resumo com p50/p95/p99.
+
+Etapas registradas:
+  disjuntor     pausa global com o disjuntor aberto (disjuntor.py)
+  espera        temporizador entre requisições (rate limit)
+  backoff       espera antes de uma nova tentativa (tentativas.py)
+  conexao_ttfb  conexão + envio + espera pelo primeiro byte (cabeçalhos)
+  download      leitura do corpo da resposta
+  parse         BeautifulSoup
+  extracao      localização dos itens e extração dos produtos
+  score         pontuação de relevância e ordenação
+  estatisticas  cálculo das estatísticas de preço
+  render        montagem da página HTML (uma vez por página)
+"""
+
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Etapas em que a busca só espera (rate limit, backoff, disjuntor): não são custo do material
+ETAPAS_ESPERA = ('disjuntor', 'espera', 'backoff')
+
+
+def percentil(valores_ordenados, p):
+    """Percentil p (0-100) pelo método nearest-rank"""
+    if not valores_ordenados:
+        return 0.0
+    posicao = max(1, math.ceil(p / 100 * len(valores_ordenados)))
+    return valores_ordenados[min(posicao, len(valores_ordenados)) - 1]
+
+
+def arquivo_tempos_padrao(prefixo='tempos', pasta='output/logs'):
+    """Caminho padrão do JSONL de tempos: output/logs/<prefixo>_<timestamp>.jsonl"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(pasta, f'{prefixo}_{timestamp}.jsonl')
+
+
+class MedidorTempos:
+    """Acumula tempos por etapa e grava uma linha JSONL por material"""
+
+    def __init__(self, arquivo_jsonl=None):
+        self.arquivo_jsonl = arquivo_jsonl
+        self._saida = None
+        if arquivo_jsonl:
+            pasta = os.path.dirname(arquivo_jsonl)
+            if pasta and not os.path.exists(pasta):
+                os.makedirs(pasta)
+            self._saida = open(arquivo_jsonl, 'a', encoding='utf-8')
+
+        self.amostras = defaultdict(list)
+        self._atual = None
+        self._inicio_material = None
+
+    def iniciar_material(self, nome_material):
+        """Começa a medição de um material"""
+        self._atual = {'tipo': 'material', 'material': nome_material, 'etapas': defaultdict(float)}
+        self._inicio_material = time.perf_counter()
+
+    def registrar(self, etapa, segundos):
+        """Soma a duração de uma etapa ao material atual"""
+        if self._atual is None:
+            self.amostras[etapa].append(segundos)
+            self._gravar({'tipo': 'avulso', 'etapas': {etapa: round(segundos, 6)}})
+        else:
+            self._atual['etapas'][etapa] += segundos
+
+    def tempo_em_espera(self):
+        """Segundos do material atual nas ETAPAS_ESPERA"""
+        if self._atual is None:
+            return 0.0
+        return sum(self._atual['etapas'].get(etapa, 0.0) for etapa in ETAPAS_ESPERA)
+
+    @contextmanager
+    def etapa(self, nome):
+        """Mede o bloco como a etapa `nome`"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio)
+
+    def finalizar_material(self, **extras):
+        """Fecha a medição do material atual e grava sua linha JSONL"""
+        if self._atual is None:
+            return
+        registro = self._atual
+        etapas = dict(registro['etapas'])
+        etapas['total'] = time.perf_counter() - self._inicio_material
+
+        for nome, segundos in etapas.items():
+            self.amostras[nome].append(segundos)
+
+        registro['etapas'] = {nome: round(segundos, 6) for nome, segundos in etapas.items()}
+        registro.update(extras)
+        self._gravar(registro)
+        self._atual = None
+
+    def _gravar(self, registro):
+        if self._saida:
+            self._saida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    def resumo(self):
+        """Estatísticas por etapa: quantidade, total, p50, p95, p99 e máximo"""
+        resumo = {}
+        for etapa, valores in self.amostras.items():
+            ordenados = sorted(valores)
+            resumo[etapa] = {
+                'n': len(ordenados),
+                'total': sum(ordenados),
+                'p50': percentil(ordenados, 50),
+                'p95': percentil(ordenados, 95),
+                'p99': percentil(ordenados, 99),
+                'max': ordenados[-1]
+            }
+        return resumo
+
+    def imprimir_resumo(self):
+        """Tabela de percentis e histograma da fatia de tempo de cada etapa"""
+        resumo = self.resumo()
+        if not resumo:
+            return
+
+        total_geral = sum(r['total'] for etapa, r in resumo.items() if etapa != 'total')
+
+        print(f"\n⏱️  Tempo por etapa (segundos):")
+        print(f"   {'etapa':<14}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'total':>10}  fatia")
+        for etapa, r in sorted(resumo.items(), key=lambda item: -item[1]['total']):
+            if etapa == 'total':
+                continue
+            fatia = r['total'] / total_geral if total_geral else 0
+            barra = '█' * int(round(fatia * 30))
+            print(f"   {etapa:<14}{r['n']:>6}{r['p50']:>9.3f}{r['p95']:>9.3f}{r['p99']:>9.3f}"
+                  f"{r['max']:>9.3f}{r['total']:>10.1f}  {barra} {fatia:.0%}")
+        if 'total' in resumo:
+            r = resumo['total']
+            print(f"   {'por material':<14}{r['n']:>6}{r['p50']:>9.3f}{r['p95']:>9.3f}{r['p99']:>9.3f}"
+                  f"{r['max']:>9.3f}{r['total']:>10.1f}")
+        if self.arquivo_jsonl:
+            print(f"   Detalhes: {self.arquivo_jsonl}")
+
+    def fechar(self):
+        """Grava o resumo no JSONL e fecha o arquivo"""
+        if self._saida:
+            self._gravar({'tipo': 'resumo', 'etapas': self.resumo()})
+            self._saida.close()
+            self._saida = None
+
+
+class MedidorNulo:
+    """Medidor que não mede nada (padrão quando não há instrumentação)"""
+
+    arquivo_jsonl = None
+
+    def iniciar_material(self, nome_material):
+        pass
+
+    def registrar(self, etapa, segundos):
+        pass
+
+    def tempo_em_espera(self):
+        return 0.0
+
+    def etapa(self, nome):
+        return nullcontext()
+
+    def finalizar_material(self, **extras):
+        pass
+
+    def imprimir_resumo(self):
+        pass
+
+    def fechar(self):
+        pass
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modelo de relevância aprendido com as decisões dos validadores
+
+Regressão logística sobre características "hasheadas" do par
+material × título do produto: palavras e pares de palavras do título,
+palavras do material presentes/ausentes no título, fração de palavras
+do material encontradas e cruzamentos palavra do material × palavra do
+título (o que é lixo para "Bola" pode não ser para "Bomba de ar").
+
+Só NumPy: a matriz é esparsa em coordenadas (linha, coluna), o produto
+matriz × pesos sai de np.bincount e um lote inteiro é pontuado de uma vez.
+Treino em treinar_modelo_relevancia.py; no buscador, produtos com
+probabilidade abaixo do limiar do modelo saem do resultado
+(BuscadorInteligente._filtrar_resultado; o cache de buscas guarda o
+resultado sem esse filtro).
+"""
+
+import json
+import os
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+ARQUIVO_MODELO_PADRAO = 'output/modelo/relevancia.npz'
+
+# Muda quando as características mudam (modelos antigos deixam de ser carregados)
+VERSAO_CARACTERISTICAS = 1
+BITS_PADRAO = 18
+
+_RE_PALAVRA = re.compile(r'\w+')
+_STOPWORDS = {'a', 'o', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'na', 'no', 'nas', 'nos',
+              'para', 'com', 'por', 'um', 'uma', 'x'}
+
+
+def palavras(texto):
+    """Palavras em minúsculas e sem acento (sem stopwords)"""
+    texto = unicodedata.normalize('NFKD', (texto or '').lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return [p for p in _RE_PALAVRA.findall(texto) if p not in _STOPWORDS]
+
+
+def caracteristicas_material(material):
+    """Palavras do material (calculadas uma vez por lote)"""
+    return sorted(set(palavras(material)))
+
+
+def caracteristicas(palavras_material, titulo):
+    """Nomes das características do par material × título"""
+    titulo = palavras(titulo)
+    no_titulo = set(titulo)
+
+    nomes = ['t:' + p for p in no_titulo]
+    nomes += ['b:%s_%s' % par for par in zip(titulo, titulo[1:])]
+    encontradas = 0
+    for p in palavras_material:
+        if p in no_titulo:
+            encontradas += 1
+            nomes.append('c:' + p)
+        else:
+            nomes.append('f:' + p)
+        nomes += ['x:%s|%s' % (p, t) for t in no_titulo]
+    if palavras_material:
+        nomes.append('p:%d' % (10 * encontradas // len(palavras_material)))
+    return nomes
+
+
+def matriz(pares, bits=BITS_PADRAO):
+    """
+    Matriz esparsa de [(material, título), ...]
+
+    Devolve (linhas, colunas) em int32/int64: a característica colunas[k]
+    está presente no par linhas[k] (valores binários).
+    """
+    mascara = (1 << bits) - 1
+    linhas = []
+    colunas = []
+    cache_material = {}
+    for i, (material, titulo) in enumerate(pares):
+        palavras_material = cache_material.get(material)
+        if palavras_material is None:
+            palavras_material = cache_material[material] = caracteristicas_material(material)
+        indices = [zlib.crc32(nome.encode('utf-8')) & mascara
+                   for nome in caracteristicas(palavras_material, titulo)]
+        colunas.extend(indices)
+        linhas.extend([i] * len(indices))
+    return np.asarray(linhas, dtype=np.int32), np.asarray(colunas, dtype=np.int64)
+
+
+def _sigmoide(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+
+
+class ModeloRelevancia:
+    """Pesos da regressão logística + limiar de descarte"""
+
+    def __init__(self, pesos, vies=0.0, limiar=0.0, info=None):
+        self.pesos = np.asarray(pesos, dtype=np.float32)
+        self.vies = float(vies)
+        self.limiar = float(limiar)
+        self.info = info or {}
+
+    @property
+    def bits(self):
+        return int(self.pesos.size).bit_length() - 1
+
+    def pontuar(self, linhas, colunas, total):
+        """Probabilidade de cada uma das total linhas da matriz"""
+        z = np.bincount(linhas, weights=self.pesos[colunas], minlength=total) + self.vies
+        return _sigmoide(z)
+
+    def probabilidades_pares(self, pares):
+        """Probabilidade de cada (material, título) ser mantido pelos validadores"""
+        if not pares:
+            return np.zeros(0)
+        linhas, colunas = matriz(pares, self.bits)
+        return self.pontuar(linhas, colunas, len(pares))
+
+    def probabilidades(self, material, titulos):
+        """Probabilidade de cada título ser mantido pelos validadores no material"""
+        return self.probabilidades_pares([(material, t) for t in titulos])
+
+    @classmethod
+    def treinar(cls, pares, rotulos, bits=BITS_PADRAO, epocas=150, taxa=0.3, l2=1e-5):
+        """
+        Ajusta os pesos (Adagrad em lote inteiro, classes balanceadas)
+
+        rotulos: 1 = mantido pelos validadores, 0 = removido.
+        """
+        y = np.asarray(rotulos, dtype=np.float64)
+        total = len(y)
+        dimensao = 1 << bits
+        linhas, colunas = matriz(pares, bits)
+
+        # Classes balanceadas: removidos costumam ser minoria
+        positivos = max(y.sum(), 1.0)
+        negativos = max(total - y.sum(), 1.0)
+        peso_amostra = np.where(y == 1, total / (2 * positivos), total / (2 * negativos)) / total
+
+        pesos = np.zeros(dimensao)
+        vies = 0.0
+        acumulado = np.full(dimensao, 1e-8)
+        acumulado_vies = 1e-8
+        for _ in range(epocas):
+            z = np.bincount(linhas, weights=pesos[colunas], minlength=total) + vies
+            erro = (_sigmoide(z) - y) * peso_amostra
+            gradiente = np.bincount(colunas, weights=erro[linhas], minlength=dimensao) + l2 * pesos
+            gradiente_vies = erro.sum()
+
+            acumulado += gradiente ** 2
+            acumulado_vies += gradiente_vies ** 2
+            pesos -= taxa * gradiente / np.sqrt(acumulado)
+            vies -= taxa * gradiente_vies / np.sqrt(acumulado_vies)
+
+        return cls(pesos, vies)
+
+    def salvar(self, arquivo=ARQUIVO_MODELO_PADRAO):
+        """Salva em .npz (pesos em float32)"""
+        pasta = os.path.dirname(arquivo)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        temporario = arquivo + '.tmp.npz'
+        np.savez_compressed(temporario, pesos=self.pesos, vies=self.vies, limiar=self.limiar,
+                            versao=VERSAO_CARACTERISTICAS, info=json.dumps(self.info, ensure_ascii=False))
+        os.replace(temporario, arquivo)
+
+    @classmethod
+    def carregar(cls, arquivo=ARQUIVO_MODELO_PADRAO):
+        """Modelo salvo, ou None (sem arquivo, ilegível ou de outra versão das características)"""
+        if not arquivo or not os.path.exists(arquivo):
+            return None
+        try:
+            with np.load(arquivo) as dados:
+                if int(dados['versao']) != VERSAO_CARACTERISTICAS:
+                    return None
+                return cls(dados['pesos'], dados['vies'], dados['limiar'], json.loads(str(dados['info'])))
+        except (OSError, ValueError, KeyError):
+            return None
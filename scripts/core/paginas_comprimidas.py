@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Páginas HTML com cópias pré-comprimidas ao lado
+
+Cada página gravada por gravar_pagina ganha pagina.html.gz (sempre) e
+pagina.html.br (com brotli ou brotlicffi instalado). O servidor local
+(servir_paginas.py) escolhe a cópia pelo Accept-Encoding do navegador,
+sem comprimir nada a cada requisição. Abrir o .html direto (file://)
+continua funcionando.
+"""
+
+import gzip
+import hashlib
+import os
+
+# Codificações na ordem de preferência, com a extensão da cópia
+EXTENSOES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _brotli():
+    """Módulo brotli (ou brotlicffi), ou None se nenhum estiver instalado"""
+    try:
+        import brotli
+    except ImportError:
+        try:
+            import brotlicffi as brotli
+        except ImportError:
+            return None
+    return brotli
+
+
+def _gravar_atomico(arquivo, dados):
+    temporario = arquivo + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(dados)
+    os.replace(temporario, arquivo)
+
+
+def comprimir_arquivo(arquivo, dados=None):
+    """
+    Grava arquivo.gz e arquivo.br (se houver brotli); devolve as extensões gravadas
+
+    Sem brotli, um .br antigo é apagado para não servir conteúdo desatualizado.
+    """
+    if dados is None:
+        with open(arquivo, 'rb') as f:
+            dados = f.read()
+
+    # mtime=0: mesma página, mesmos bytes (e mesmo ETag)
+    _gravar_atomico(arquivo + '.gz', gzip.compress(dados, compresslevel=9, mtime=0))
+    gravadas = ['.gz']
+
+    brotli = _brotli()
+    if brotli:
+        _gravar_atomico(arquivo + '.br', brotli.compress(dados, quality=11))
+        gravadas.append('.br')
+    elif os.path.exists(arquivo + '.br'):
+        os.remove(arquivo + '.br')
+    return gravadas
+
+
+def gravar_pagina(arquivo, html):
+    """Grava a página (texto) e as cópias comprimidas"""
+    dados = html.encode('utf-8')
+    _gravar_atomico(arquivo, dados)
+    comprimir_arquivo(arquivo, dados)
+
+
+def copia_atualizada(arquivo, extensao):
+    """True se arquivo+extensao existe e não é mais antigo que o original"""
+    copia = arquivo + extensao
+    return os.path.exists(copia) and os.path.getmtime(copia) >= os.path.getmtime(arquivo)
+
+
+def comprimir_pasta(pasta, extensoes_origem=('.html',)):
+    """Comprime os arquivos da pasta sem cópias atualizadas (ex.: páginas antigas); devolve quantos"""
+    total = 0
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            arquivo = os.path.join(raiz, nome)
+            if nome.endswith(extensoes_origem) and not copia_atualizada(arquivo, '.gz'):
+                comprimir_arquivo(arquivo)
+                total += 1
+    return total
+
+
+def codificacoes_aceitas(accept_encoding):
+    """
+    {codificação: q} do cabeçalho Accept-Encoding
+
+    'gzip;q=0' recusa gzip; '*' vale para as codificações não citadas.
+    """
+    aceitas = {}
+    for parte in (accept_encoding or '').split(','):
+        nome, _, parametros = parte.strip().partition(';')
+        if not nome:
+            continue
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        aceitas[nome.strip().lower()] = q
+    return aceitas
+
+
+def escolher_variante(arquivo, accept_encoding):
+    """
+    (caminho a enviar, Content-Encoding ou None) para o Accept-Encoding dado
+
+    Usa a melhor cópia comprimida aceita pelo navegador e não mais antiga
+    que o original; senão, o próprio arquivo.
+    """
+    aceitas = codificacoes_aceitas(accept_encoding)
+    for codificacao, extensao in EXTENSOES:
+        q = aceitas.get(codificacao, aceitas.get('*', 0.0))
+        if q > 0 and copia_atualizada(arquivo, extensao):
+            return arquivo + extensao, codificacao
+    return arquivo, None
+
+
+class CacheEtags:
+    """ETag forte (hash do conteúdo) de cada arquivo, recalculado só quando ele muda"""
+
+    def __init__(self):
+        self.etags = {}
+
+    def obter(self, arquivo):
+        estado = os.stat(arquivo)
+        chave = (estado.st_mtime_ns, estado.st_size)
+        guardado = self.etags.get(arquivo)
+        if guardado and guardado[0] == chave:
+            return guardado[1]
+
+        sha = hashlib.sha1()
+        with open(arquivo, 'rb') as f:
+            for bloco in iter(lambda: f.read(64 * 1024), b''):
+                sha.update(bloco)
+        etag = f'"{sha.hexdigest()[:20]}"'
+        self.etags[arquivo] = (chave, etag)
+        return etag
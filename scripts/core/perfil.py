@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo de profiling (--profile) dos scripts de processamento
+
+Executa uma função sob cProfile, tracemalloc e um amostrador de pilhas,
+e grava em output/logs/:
+  <nome>_<data>.prof        estatísticas do cProfile (snakeviz, pstats)
+  <nome>_<data>_top.txt     funções com maior tempo acumulado
+  <nome>_<data>_alocacoes.txt  maiores alocações de memória (tracemalloc)
+  <nome>_<data>.collapsed   pilhas no formato "a;b;c N" (flamegraph.pl, speedscope)
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+PASTA_LOGS_PADRAO = 'output/logs'
+
+
+class AmostradorPilhas(threading.Thread):
+    """Amostra periodicamente a pilha de uma thread e conta as pilhas colapsadas"""
+
+    def __init__(self, id_thread, intervalo=0.005):
+        super().__init__(daemon=True)
+        self.id_thread = id_thread
+        self.intervalo = intervalo
+        self.contagem = Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.id_thread)
+            pilha = []
+            while frame is not None:
+                codigo = frame.f_code
+                pilha.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                frame = frame.f_back
+            if pilha:
+                self.contagem[';'.join(reversed(pilha))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+    def salvar(self, arquivo):
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            for pilha, quantidade in self.contagem.most_common():
+                f.write(f"{pilha} {quantidade}\n")
+
+
+def executar_com_perfil(funcao, *args, nome='perfil', pasta_logs=PASTA_LOGS_PADRAO,
+                        top=40, **kwargs):
+    """Executa funcao(*args, **kwargs) com profiling e grava os relatórios"""
+    if not os.path.exists(pasta_logs):
+        os.makedirs(pasta_logs)
+
+    base = os.path.join(pasta_logs, f"{nome}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    print(f"🔬 Profiling ativo (cProfile + tracemalloc + amostragem de pilhas)")
+
+    tracemalloc.start(10)
+    amostrador = AmostradorPilhas(threading.get_ident())
+    amostrador.start()
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+
+    try:
+        return perfil.runcall(funcao, *args, **kwargs)
+    finally:
+        duracao = time.perf_counter() - inicio
+        amostrador.parar()
+        snapshot = tracemalloc.take_snapshot()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        perfil.dump_stats(f'{base}.prof')
+
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats('cumulative').print_stats(top)
+        with open(f'{base}_top.txt', 'w', encoding='utf-8') as f:
+            f.write(texto.getvalue())
+
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ])
+        with open(f'{base}_alocacoes.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Pico de memória rastreada: {pico / 1024 / 1024:.1f} MiB\n\n")
+            for estatistica in snapshot.statistics('traceback')[:top]:
+                f.write(f"{estatistica.size / 1024:.1f} KiB em {estatistica.count} blocos\n")
+                for linha in estatistica.traceback.format():
+                    f.write(f"    {linha}\n")
+                f.write("\n")
+
+        amostrador.salvar(f'{base}.collapsed')
+
+        print(f"\n🔬 Profiling concluído em {duracao:.1f}s (pico de memória: {pico / 1024 / 1024:.1f} MiB)")
+        print(f"   • {base}.prof")
+        print(f"   • {base}_top.txt")
+        print(f"   • {base}_alocacoes.txt")
+        print(f"   • {base}.collapsed ({sum(amostrador.contagem.values())} amostras)")
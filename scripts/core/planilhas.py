@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura e gravação de tabelas entre as etapas do processo
+
+xlsx só é usado nas pontas (planilha original e resultados para pessoas).
+Entre etapas as partes são manifestos JSON com os índices das linhas de uma
+cópia única da planilha original em pickle, que carregam em milissegundos.
+
+Planilhas .xlsx lidas por carregar_planilha() são convertidas uma única vez
+em um snapshot (output/cache/), reaproveitado enquanto o arquivo não mudar.
+
+pandas só é importado nas funções que leem tabelas: listar e localizar
+partes (menu, status) não pagam o custo de importação.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+
+PREFIXO_PARTE = 'materiais_parte_'
+EXTENSOES_PARTE = ('.json', '.xlsx')  # em ordem de preferência
+ARQUIVO_BASE_PARTES = 'materiais_base.pkl'
+
+PASTA_CACHE_PADRAO = 'output/cache'
+
+# Acima deste tamanho a planilha é lida em streaming (openpyxl read-only)
+LIMITE_STREAMING_BYTES = 20 * 1024 * 1024
+
+
+def chave_snapshot(arquivo):
+    """Chave do snapshot: caminho absoluto, tamanho e data de modificação do arquivo"""
+    info = os.stat(arquivo)
+    identidade = f"{os.path.abspath(arquivo)}|{info.st_size}|{info.st_mtime_ns}"
+    return hashlib.sha1(identidade.encode('utf-8')).hexdigest()[:16]
+
+
+def ler_excel_streaming(arquivo):
+    """Lê a primeira aba linha a linha (openpyxl read-only), sem carregar a planilha inteira"""
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = wb.worksheets[0].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return pd.DataFrame()
+        colunas = [str(c) if c is not None else f'Unnamed: {i}' for i, c in enumerate(cabecalho)]
+        return pd.DataFrame.from_records(linhas, columns=colunas)
+    finally:
+        wb.close()
+
+
+def carregar_planilha(arquivo, pasta_cache=PASTA_CACHE_PADRAO):
+    """
+    Lê uma planilha .xlsx usando snapshot em cache
+
+    Na primeira leitura o Excel é convertido e salvo em
+    pasta_cache/<nome>_<chave>.pkl; as leituras seguintes carregam o
+    snapshot enquanto tamanho e data de modificação não mudarem.
+    Planilhas grandes são lidas em streaming.
+    """
+    import pandas as pd
+
+    nome_base = os.path.splitext(os.path.basename(arquivo))[0]
+    snapshot = os.path.join(pasta_cache, f'{nome_base}_{chave_snapshot(arquivo)}.pkl')
+
+    if os.path.exists(snapshot):
+        try:
+            return pd.read_pickle(snapshot)
+        except Exception:
+            pass  # snapshot corrompido: lê o Excel de novo
+
+    if os.path.getsize(arquivo) > LIMITE_STREAMING_BYTES:
+        df = ler_excel_streaming(arquivo)
+    else:
+        df = pd.read_excel(arquivo)
+
+    try:
+        if not os.path.exists(pasta_cache):
+            os.makedirs(pasta_cache)
+        # Remove snapshots de versões anteriores do mesmo arquivo
+        for antigo in glob.glob(os.path.join(pasta_cache, f'{glob.escape(nome_base)}_*.pkl')):
+            if re.fullmatch(r'[0-9a-f]{16}', os.path.basename(antigo)[len(nome_base) + 1:-4]):
+                os.remove(antigo)
+        temporario = snapshot + '.tmp'
+        df.to_pickle(temporario)
+        os.replace(temporario, snapshot)
+    except OSError:
+        pass  # sem cache (pasta somente leitura etc.): segue com o DataFrame lido
+
+    return df
+
+
+def ler_tabela(arquivo):
+    """Lê tabela pelo formato da extensão (.xlsx, .pkl, .parquet ou manifesto de parte .json)"""
+    import pandas as pd
+
+    extensao = os.path.splitext(arquivo)[1].lower()
+
+    if extensao == '.json':
+        return ler_parte(arquivo)
+    if extensao == '.pkl':
+        return pd.read_pickle(arquivo)
+    if extensao == '.parquet':
+        return pd.read_parquet(arquivo)
+    if extensao == '.xlsx':
+        return carregar_planilha(arquivo)
+    if extensao == '.xls':
+        return pd.read_excel(arquivo)
+
+    raise ValueError(f"Formato de tabela não suportado: {arquivo}")
+
+
+def salvar_tabela(df, arquivo):
+    """Salva tabela no formato da extensão (.xlsx, .pkl ou .parquet)"""
+    extensao = os.path.splitext(arquivo)[1].lower()
+
+    if extensao == '.pkl':
+        df.to_pickle(arquivo)
+    elif extensao == '.parquet':
+        df.to_parquet(arquivo, index=False)
+    elif extensao == '.xlsx':
+        df.to_excel(arquivo, index=False)
+    else:
+        raise ValueError(f"Formato de tabela não suportado: {arquivo}")
+
+    return arquivo
+
+
+def salvar_base_partes(df, pasta_partes):
+    """Grava a cópia única da planilha original referenciada pelas partes"""
+    arquivo = os.path.join(pasta_partes, ARQUIVO_BASE_PARTES)
+    df.to_pickle(arquivo)
+    return arquivo
+
+
+def salvar_parte(pasta_partes, numero_parte, linhas):
+    """
+    Grava o manifesto de uma parte (índices das linhas na base)
+
+    Retorna (caminho, True se o conteúdo mudou)
+    """
+    arquivo = os.path.join(pasta_partes, f'{PREFIXO_PARTE}{numero_parte}.json')
+    manifesto = {
+        'parte': int(numero_parte),
+        'base': ARQUIVO_BASE_PARTES,
+        'linhas': [int(l) for l in linhas]
+    }
+
+    if os.path.exists(arquivo):
+        try:
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                if json.load(f) == manifesto:
+                    return arquivo, False
+        except (OSError, ValueError):
+            pass
+
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f)
+    return arquivo, True
+
+
+def ler_parte(arquivo):
+    """Carrega as linhas de uma parte a partir do manifesto e da base"""
+    import pandas as pd
+
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        manifesto = json.load(f)
+
+    base = os.path.join(os.path.dirname(arquivo), manifesto['base'])
+    df = pd.read_pickle(base)
+    return df.iloc[manifesto['linhas']].reset_index(drop=True)
+
+
+def numero_da_parte(arquivo):
+    """Número da parte pelo nome do arquivo: materiais_parte_3.json -> 3"""
+    match = re.match(rf'{PREFIXO_PARTE}(\d+)\.', os.path.basename(arquivo))
+    return int(match.group(1)) if match else None
+
+
+def listar_arquivos_partes(pasta_partes):
+    """
+    Arquivos de partes da pasta, ordenados pelo número da parte
+
+    Se uma parte existir em mais de um formato, usa o manifesto JSON
+    (partes em .xlsx de divisões antigas continuam funcionando)
+    """
+    if not os.path.exists(pasta_partes):
+        return []
+
+    por_numero = {}
+    for arquivo in os.listdir(pasta_partes):
+        extensao = os.path.splitext(arquivo)[1].lower()
+        numero = numero_da_parte(arquivo)
+        if numero is None or extensao not in EXTENSOES_PARTE:
+            continue
+        atual = por_numero.get(numero)
+        if atual is None or EXTENSOES_PARTE.index(extensao) < EXTENSOES_PARTE.index(os.path.splitext(atual)[1]):
+            por_numero[numero] = arquivo
+
+    return [por_numero[n] for n in sorted(por_numero)]
+
+
+def remover_partes_excedentes(pasta_partes, num_partes):
+    """
+    Apaga os arquivos das partes acima de num_partes (de divisões anteriores)
+
+    Os manifestos apontam para linhas da base, que é regravada a cada
+    divisão: uma parte antiga selecionaria linhas de outras partes (ou fora
+    da planilha). Devolve os números das partes apagadas.
+    """
+    removidas = set()
+    if not os.path.exists(pasta_partes):
+        return []
+    for arquivo in os.listdir(pasta_partes):
+        numero = numero_da_parte(arquivo)
+        if numero is not None and numero > num_partes and os.path.splitext(arquivo)[1].lower() in EXTENSOES_PARTE:
+            os.remove(os.path.join(pasta_partes, arquivo))
+            removidas.add(numero)
+    return sorted(removidas)
+
+
+def caminho_parte(pasta_partes, numero_parte):
+    """Caminho do arquivo da parte (None se não existir)"""
+    for extensao in EXTENSOES_PARTE:
+        arquivo = os.path.join(pasta_partes, f'{PREFIXO_PARTE}{numero_parte}{extensao}')
+        if os.path.exists(arquivo):
+            return arquivo
+    return None
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro compacto de produto extraído das listagens do Mercado Livre
+
+O mesmo anúncio costuma aparecer na busca de vários materiais. Cada
+anúncio vira um único Produto no CatalogoProdutos (chave: ID MLB do link),
+e cada material guarda só ItemMaterial(produto, score_relevancia).
+"""
+
+import hashlib
+import json
+import re
+
+# Campos de cada produto no catálogo embutido nas páginas HTML
+CAMPOS_CATALOGO = ('nome', 'preco', 'link', 'loja')
+
+# MLB-1234567890 (anúncio), /p/MLB12345678 (produto de catálogo), MLB1234567890 em redirecionamentos
+_RE_ID_ITEM = re.compile(r'\bMLB-?(\d{6,})', re.IGNORECASE)
+
+
+def extrair_id_item(link):
+    """ID do item do Mercado Livre ('MLB1234567890') a partir do link, ou None"""
+    encontrado = _RE_ID_ITEM.search(link or '')
+    return f"MLB{encontrado.group(1)}" if encontrado else None
+
+
+class Produto:
+    """Anúncio da listagem (__slots__: sem __dict__ por instância)"""
+
+    __slots__ = ('id_item', 'nome', 'preco', 'link', 'imagem', 'loja')
+
+    def __init__(self, nome, preco, link='', imagem='', loja='', id_item=None):
+        self.id_item = id_item or extrair_id_item(link)
+        self.nome = nome
+        self.preco = preco
+        self.link = link
+        self.imagem = imagem
+        self.loja = loja
+
+    @property
+    def chave(self):
+        """Chave no catálogo: o ID MLB ou, sem ele, um hash do link/nome"""
+        if self.id_item:
+            return self.id_item
+        origem = (self.link or ' '.join(self.nome.lower().split())).encode('utf-8')
+        return 'X' + hashlib.sha1(origem).hexdigest()[:12]
+
+    def para_dict(self, campos=CAMPOS_CATALOGO):
+        """Dicionário com os campos pedidos (usado só na serialização)"""
+        return {campo: getattr(self, campo) for campo in campos}
+
+    def __repr__(self):
+        return f"Produto(id={self.chave!r}, nome={self.nome!r}, preco={self.preco!r})"
+
+
+class ItemMaterial:
+    """Produto no resultado de um material, com a relevância para aquele material"""
+
+    __slots__ = ('produto', 'score_relevancia')
+
+    def __init__(self, produto, score_relevancia=0.0):
+        self.produto = produto
+        self.score_relevancia = score_relevancia
+
+    # Campos do produto, para quem só lê o resultado
+    @property
+    def chave(self):
+        return self.produto.chave
+
+    @property
+    def nome(self):
+        return self.produto.nome
+
+    @property
+    def preco(self):
+        return self.produto.preco
+
+    @property
+    def link(self):
+        return self.produto.link
+
+    def __repr__(self):
+        return f"ItemMaterial({self.produto!r}, score={self.score_relevancia:.2f})"
+
+
+class CatalogoProdutos:
+    """Um Produto por anúncio, compartilhado por todos os materiais da execução"""
+
+    def __init__(self):
+        self.produtos = {}
+        self.repetidos = 0  # registros que reaproveitaram um produto já conhecido
+
+    def registrar(self, produto, atualizar=True):
+        """
+        Produto canônico do anúncio
+
+        Com atualizar, o preço/link/loja mais recentes substituem os anteriores
+        (e valem para todos os materiais que apontam para o produto).
+        """
+        chave = produto.chave
+        existente = self.produtos.get(chave)
+        if existente is None:
+            self.produtos[chave] = produto
+            return produto
+
+        self.repetidos += 1
+        if atualizar and existente is not produto:
+            existente.preco = produto.preco
+            existente.link = produto.link or existente.link
+            existente.imagem = produto.imagem or existente.imagem
+            existente.loja = produto.loja or existente.loja
+        return existente
+
+    def registrar_itens(self, itens):
+        """Troca os produtos dos itens (ex.: vindos do cache) pelos do catálogo, sem atualizar preços"""
+        for item in itens:
+            item.produto = self.produtos.setdefault(item.produto.chave, item.produto)
+        return itens
+
+    def __len__(self):
+        return len(self.produtos)
+
+
+def catalogo_para_json(materiais_dados, campos=CAMPOS_CATALOGO):
+    """
+    Catálogo e materiais para embutir na página
+
+    Devolve (catalogo, materiais): catalogo = {chave: {campos}} só com os
+    produtos usados; em cada material, 'produtos' vira [[chave, score], ...]
+    e 'primeiro_id' é o número do seu primeiro produto na página (os
+    produtos são numerados em sequência, material a material).
+    """
+    catalogo = {}
+    materiais = []
+    primeiro_id = 0
+    for material in materiais_dados:
+        referencias = []
+        for item in material.get('produtos') or []:
+            chave = item.chave
+            if chave not in catalogo:
+                catalogo[chave] = item.produto.para_dict(campos)
+            referencias.append([chave, round(item.score_relevancia, 2)])
+        materiais.append({**material, 'primeiro_id': primeiro_id, 'produtos': referencias})
+        primeiro_id += len(referencias)
+    return catalogo, materiais
+
+
+def hash_produtos_pagina(materiais):
+    """
+    Hash (16 hex) dos ids dos produtos de cada material, na ordem da página
+
+    Era a chave dos removidos no localStorage (um bit por posição de produto);
+    a página a usa para converter esses bitsets nos removidos por id do anúncio.
+    Aceita os materiais de catalogo_para_json ([chave, score]) e os de
+    páginas antigas (produto inteiro dentro do material).
+    """
+    ids = [[ref[0] if isinstance(ref, list) else (ref.get('id_item') or ref.get('link') or ref.get('nome'))
+            for ref in material.get('produtos') or []]
+           for material in materiais]
+    texto = json.dumps(ids, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def produtos_para_json(itens):
+    """JSON da lista de itens de um material para a coluna Links_Produtos_JSON"""
+    return json.dumps([
+        {'id_item': item.produto.id_item, 'nome': item.nome, 'preco': item.preco, 'link': item.link,
+         'score_relevancia': round(item.score_relevancia, 2)}
+        for item in itens
+    ], ensure_ascii=False)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Produtos removidos pelos validadores, por material
+
+As remoções feitas nas páginas (localStorage) são importadas das planilhas
+exportadas (coluna Removidos_JSON) ou do JSON baixado pelo botão
+"Baixar Removidos" e acumuladas em output/remocoes.json:
+
+  {material: {id do produto: nome do produto}}
+
+O id é a chave do produto no catálogo (produto.Produto.chave: ID MLB ou,
+sem ele, hash do link/nome). Nas buscas seguintes esses produtos saem do
+resultado (BuscadorInteligente._filtrar_resultado), antes das estatísticas e
+da página; o cache de buscas guarda o resultado sem esse filtro.
+"""
+
+import json
+import os
+
+from historico_custos import chave_material
+from produto import Produto
+
+ARQUIVO_REMOCOES_PADRAO = 'output/remocoes.json'
+
+
+def carregar_remocoes(arquivo=ARQUIVO_REMOCOES_PADRAO):
+    """Remoções acumuladas (dicionário vazio se não existir)"""
+    if not arquivo or not os.path.exists(arquivo):
+        return {}
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def salvar_remocoes(remocoes, arquivo=ARQUIVO_REMOCOES_PADRAO):
+    """Salva as remoções"""
+    pasta = os.path.dirname(arquivo)
+    if pasta and not os.path.exists(pasta):
+        os.makedirs(pasta)
+    temporario = arquivo + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(remocoes, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporario, arquivo)
+
+
+def chave_produto(produto):
+    """Id de um produto removido ({id, nome, link}); páginas antigas não trazem o id"""
+    if produto.get('id'):
+        return produto['id']
+    return Produto(produto.get('nome') or '', 0, produto.get('link') or '').chave
+
+
+def registrar_remocoes(remocoes, nome_material, produtos):
+    """Acrescenta os produtos removidos de um material; devolve quantos eram novos"""
+    removidos = remocoes.setdefault(chave_material(nome_material), {})
+    novos = 0
+    for produto in produtos:
+        chave = chave_produto(produto)
+        if chave not in removidos:
+            removidos[chave] = produto.get('nome') or ''
+            novos += 1
+    return novos
+
+
+def importar_json(remocoes, arquivo):
+    """Importa o JSON do botão "Baixar Removidos" ({'materiais': {nome: [produtos]}})"""
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    return sum(registrar_remocoes(remocoes, nome, produtos)
+               for nome, produtos in dados.get('materiais', {}).items())
+
+
+def importar_exportacao(remocoes, arquivo):
+    """Importa a coluna Removidos_JSON de uma planilha exportada pelas páginas"""
+    from planilhas import ler_excel_streaming
+
+    df = ler_excel_streaming(arquivo)
+    if 'Material' not in df.columns or 'Removidos_JSON' not in df.columns:
+        raise ValueError("planilha sem as colunas Material e Removidos_JSON "
+                         "(exportada antes de as remoções irem para a planilha?)")
+
+    linhas = df.loc[df['Removidos_JSON'].notna(), ['Material', 'Removidos_JSON']]
+    return sum(registrar_remocoes(remocoes, nome, json.loads(texto))
+               for nome, texto in linhas.itertuples(index=False, name=None))
+
+
+def removidos_por_material(remocoes):
+    """{material: frozenset de ids} para o buscador"""
+    return {material: frozenset(produtos) for material, produtos in remocoes.items() if produtos}
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classificação de falhas de busca e política de novas tentativas
+
+Classes de falha de um material:
+  transitorio      erro de rede, timeout ou HTTP 5xx   → nova tentativa com backoff
+  limitado         HTTP 429 (ou 503 com Retry-After)   → nova tentativa, respeitando Retry-After
+  bloqueado        HTTP 403 ou página de captcha       → adiado para o fim da execução
+  layout_alterado  página sem os itens esperados       → adiado para o fim da execução
+  vazio            busca sem resultados (não é erro)   → resultado final
+  erro_http        outros 4xx                          → resultado final
+  inesperado       exceção não prevista (bug)          → resultado final
+
+O backoff é exponencial com jitter completo: espera sorteada entre 0 e
+min(teto, base * 2^tentativa), para que várias execuções não sincronizem.
+"""
+
+import random
+from collections import Counter
+
+TRANSITORIO = 'transitorio'
+LIMITADO = 'limitado'
+BLOQUEADO = 'bloqueado'
+LAYOUT_ALTERADO = 'layout_alterado'
+VAZIO = 'vazio'
+ERRO_HTTP = 'erro_http'
+INESPERADO = 'inesperado'
+
+# Repetidas na hora (com backoff) e, se ainda falharem, adiadas
+RETENTAVEIS = frozenset({TRANSITORIO, LIMITADO})
+# Tentadas de novo no fim da execução
+ADIAVEIS = frozenset({TRANSITORIO, LIMITADO, BLOQUEADO, LAYOUT_ALTERADO})
+
+# Trechos (minúsculos) de páginas de verificação/captcha
+ASSINATURAS_BLOQUEIO = (
+    b'captcha',
+    b'account-verification',
+    b'suspicious-traffic',
+    b'px-captcha',
+)
+
+# Trechos de páginas de busca sem resultados
+ASSINATURAS_SEM_RESULTADOS = (
+    b'ui-search-rescue',
+    b'n\xc3\xa3o h\xc3\xa1 an\xc3\xbancios que correspondam',  # "não há anúncios que correspondam"
+    b'nao ha anuncios que correspondam',
+)
+
+
+class FalhaBusca(Exception):
+    """Falha classificada da busca de um material"""
+
+    def __init__(self, classe, mensagem='', retry_after=None):
+        super().__init__(mensagem or classe)
+        self.classe = classe
+        self.retry_after = retry_after
+
+
+def contem_assinatura(conteudo, assinaturas):
+    """True se o corpo (bytes) contém algum dos trechos, sem diferenciar maiúsculas"""
+    conteudo = conteudo.lower()
+    return any(assinatura in conteudo for assinatura in assinaturas)
+
+
+def classificar_status(status_code):
+    """Classe de falha de um status HTTP (None se não é erro)"""
+    if status_code < 400:
+        return None
+    if status_code == 429:
+        return LIMITADO
+    if status_code == 403:
+        return BLOQUEADO
+    if status_code >= 500:
+        return TRANSITORIO
+    return ERRO_HTTP
+
+
+def ler_retry_after(valor):
+    """Segundos do cabeçalho Retry-After (só a forma numérica; None se ausente ou data)"""
+    try:
+        return max(0.0, float(valor))
+    except (TypeError, ValueError):
+        return None
+
+
+class PoliticaTentativas:
+    """Quantas tentativas fazer e quanto esperar entre elas"""
+
+    def __init__(self, max_tentativas=3, base=2.0, teto=60.0, teto_retry_after=300.0):
+        self.max_tentativas = max_tentativas
+        self.base = base
+        self.teto = teto
+        self.teto_retry_after = teto_retry_after
+
+    def deve_repetir(self, falha, tentativa):
+        """tentativa: número da tentativa que acabou de falhar (1, 2, ...)"""
+        return falha.classe in RETENTAVEIS and tentativa < self.max_tentativas
+
+    def espera(self, falha, tentativa):
+        """Segundos até a próxima tentativa (jitter completo; Retry-After como mínimo)"""
+        espera = random.uniform(0, min(self.teto, self.base * 2 ** tentativa))
+        if falha.retry_after is not None:
+            espera = max(espera, min(falha.retry_after, self.teto_retry_after))
+        return espera
+
+
+class FilaAdiada:
+    """Materiais que falharam e serão tentados de novo no fim da execução"""
+
+    def __init__(self):
+        self.itens = []
+
+    def adiar(self, chave, nome_material, classe):
+        """chave identifica o material para quem processa (ex.: posição na planilha)"""
+        self.itens.append((chave, nome_material, classe))
+
+    def adiar_se_falhou(self, chave, nome_material, resultado):
+        """Adia o material se a busca terminou em erro de classe adiável (True se adiou)"""
+        if resultado.get('status') == 'erro' and resultado.get('classe') in ADIAVEIS:
+            self.adiar(chave, nome_material, resultado['classe'])
+            return True
+        return False
+
+    def __len__(self):
+        return len(self.itens)
+
+    def __iter__(self):
+        return iter(self.itens)
+
+    def resumo(self):
+        """Quantidade de materiais adiados por classe de falha"""
+        return Counter(classe for _, _, classe in self.itens)
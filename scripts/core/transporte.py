@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Camada HTTP das buscas (pool de conexões, compressão e HTTP/2 opcional)
+
+- Conexões keep-alive reaproveitadas, com pool dimensionado por host
+  (pool_block: no máximo N conexões por host mesmo com várias threads)
+- Accept-Encoding com gzip/deflate, e br/zstd quando brotli/zstandard
+  estão instalados; o corpo é descomprimido em streaming, por blocos
+- Timeout de conexão separado do timeout de leitura
+- HTTP/2 opcional via httpx (pip install "httpx[http2]"); sem ele, usa requests
+- Contagem de requisições e de bytes (na rede e descomprimidos)
+
+requests/httpx só são importados quando o primeiro Transporte é criado.
+"""
+
+import importlib.util
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT_PADRAO = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+POOL_HOSTS = 4             # hosts distintos mantidos no pool
+POOL_POR_HOST = 10         # conexões keep-alive por host
+TIMEOUT_CONEXAO = 5        # segundos para abrir a conexão (TCP + TLS)
+TIMEOUT_LEITURA = 15       # segundos sem receber dados da resposta
+TAMANHO_BLOCO = 64 * 1024  # bytes lidos por vez do corpo
+
+
+def _instalado(modulo):
+    return importlib.util.find_spec(modulo) is not None
+
+
+def codificacoes_aceitas():
+    """Valor de Accept-Encoding com as compressões que sabemos descomprimir"""
+    codificacoes = ['gzip', 'deflate']
+    if _instalado('brotli') or _instalado('brotlicffi'):
+        codificacoes.append('br')
+    if _instalado('zstandard'):
+        codificacoes.append('zstd')
+    return ', '.join(codificacoes)
+
+
+def http2_disponivel():
+    """True se httpx e h2 estão instalados"""
+    return _instalado('httpx') and _instalado('h2')
+
+
+class ErroRede(Exception):
+    """Falha de conexão, timeout ou resposta interrompida (qualquer backend)"""
+
+
+class ErroHTTP(Exception):
+    """Resposta com status HTTP de erro (4xx/5xx)"""
+
+    def __init__(self, status_code, url):
+        super().__init__(f"HTTP {status_code} em {url}")
+        self.status_code = status_code
+        self.url = url
+
+
+class Resposta:
+    """Resposta já lida: status, cabeçalhos, corpo descomprimido e bytes na rede"""
+
+    __slots__ = ('status_code', 'headers', 'conteudo', 'url', 'bytes_rede', 'versao_http')
+
+    def __init__(self, status_code, headers, conteudo, url, bytes_rede, versao_http):
+        self.status_code = status_code
+        self.headers = headers
+        self.conteudo = conteudo
+        self.url = url
+        self.bytes_rede = bytes_rede
+        self.versao_http = versao_http
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ErroHTTP(self.status_code, self.url)
+
+
+class Transporte:
+    """Cliente HTTP compartilhado pelas buscas"""
+
+    def __init__(self, pool_por_host=POOL_POR_HOST, timeout_conexao=TIMEOUT_CONEXAO,
+                 timeout_leitura=TIMEOUT_LEITURA, http2=False, user_agent=USER_AGENT_PADRAO):
+        self.timeout = (timeout_conexao, timeout_leitura)
+        self.headers = {
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+            'Accept-Encoding': codificacoes_aceitas(),
+            'Accept-Language': 'pt-BR,pt;q=0.9',
+            'Connection': 'keep-alive'
+        }
+
+        if http2 and not http2_disponivel():
+            logger.warning("⚠️  HTTP/2 pedido, mas httpx[http2] não está instalado; usando HTTP/1.1 (requests)")
+            http2 = False
+        self.http2 = http2
+
+        if http2:
+            import httpx
+            self.cliente = httpx.Client(
+                http2=True,
+                headers=self.headers,
+                limits=httpx.Limits(max_connections=POOL_HOSTS * pool_por_host,
+                                    max_keepalive_connections=pool_por_host),
+                timeout=httpx.Timeout(timeout_leitura, connect=timeout_conexao),
+                follow_redirects=True
+            )
+            self._erros_rede = (httpx.TransportError, OSError)
+        else:
+            import requests
+            import urllib3
+            from requests.adapters import HTTPAdapter
+            self.cliente = requests.Session()
+            self.cliente.headers.update(self.headers)
+            adaptador = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_por_host,
+                                    pool_block=True, max_retries=0)
+            self.cliente.mount('https://', adaptador)
+            self.cliente.mount('http://', adaptador)
+            self._erros_rede = (requests.RequestException, urllib3.exceptions.HTTPError, OSError)
+
+        self.requisicoes = 0
+        self.bytes_rede = 0
+        self.bytes_conteudo = 0
+
+    def get(self, url, headers=None, medidor=None):
+        """
+        GET completo de url (Resposta)
+
+        Com medidor, mede 'conexao_ttfb' (até os cabeçalhos) e 'download'
+        (leitura e descompressão do corpo) separadamente.
+        Erros de conexão/timeout saem como ErroRede; status HTTP de erro não
+        geram exceção (ver Resposta.raise_for_status).
+        """
+        try:
+            if self.http2:
+                resposta = self._get_httpx(url, headers, medidor)
+            else:
+                resposta = self._get_requests(url, headers, medidor)
+        except self._erros_rede as e:
+            raise ErroRede(f"{type(e).__name__}: {e}") from e
+
+        self.requisicoes += 1
+        self.bytes_rede += resposta.bytes_rede
+        self.bytes_conteudo += len(resposta.conteudo)
+        return resposta
+
+    def _get_requests(self, url, headers, medidor):
+        inicio = time.perf_counter()
+        response = self.cliente.get(url, headers=headers, timeout=self.timeout, stream=True)
+        ttfb = time.perf_counter()
+        try:
+            blocos = list(response.raw.stream(TAMANHO_BLOCO, decode_content=True))
+            # tell(): bytes lidos do socket (ainda comprimidos)
+            bytes_rede = response.raw.tell()
+        finally:
+            response.close()
+        fim = time.perf_counter()
+        self._medir(medidor, inicio, ttfb, fim)
+
+        versao = {10: 'HTTP/1.0', 11: 'HTTP/1.1'}.get(response.raw.version, 'HTTP/1.1')
+        return Resposta(response.status_code, response.headers, b''.join(blocos),
+                        response.url, bytes_rede, versao)
+
+    def _get_httpx(self, url, headers, medidor):
+        inicio = time.perf_counter()
+        with self.cliente.stream('GET', url, headers=headers) as response:
+            ttfb = time.perf_counter()
+            blocos = list(response.iter_bytes(TAMANHO_BLOCO))
+            bytes_rede = response.num_bytes_downloaded
+        fim = time.perf_counter()
+        self._medir(medidor, inicio, ttfb, fim)
+
+        return Resposta(response.status_code, response.headers, b''.join(blocos),
+                        str(response.url), bytes_rede, response.http_version)
+
+    @staticmethod
+    def _medir(medidor, inicio, ttfb, fim):
+        if medidor is not None:
+            medidor.registrar('conexao_ttfb', ttfb - inicio)
+            medidor.registrar('download', fim - ttfb)
+
+    def resumo(self):
+        """Requisições e bytes transferidos até agora"""
+        return {
+            'requisicoes': self.requisicoes,
+            'bytes_rede': self.bytes_rede,
+            'bytes_conteudo': self.bytes_conteudo,
+            'protocolo': 'HTTP/2' if self.http2 else 'HTTP/1.1'
+        }
+
+    def imprimir_resumo(self):
+        """Uma linha com requisições, bytes na rede e taxa de compressão"""
+        if not self.requisicoes:
+            return
+        rede_mib = self.bytes_rede / 1024 / 1024
+        conteudo_mib = self.bytes_conteudo / 1024 / 1024
+        economia = 1 - self.bytes_rede / self.bytes_conteudo if self.bytes_conteudo else 0
+        print(f"📶 {self.requisicoes} requisições ({self.resumo()['protocolo']}, "
+              f"{self.headers['Accept-Encoding']}): {rede_mib:.1f} MiB na rede, "
+              f"{conteudo_mib:.1f} MiB descomprimidos ({economia:.0%} economizado)")
+
+    def fechar(self):
+        self.cliente.close()
+
+
+def adicionar_argumentos_transporte(parser):
+    """Adiciona --http2, --pool-por-host, --timeout-conexao e --timeout-leitura a um argparse"""
+    parser.add_argument('--http2', action='store_true',
+                        help='Usar HTTP/2 (requer: pip install "httpx[http2]")')
+    parser.add_argument('--pool-por-host', type=int, default=POOL_POR_HOST, metavar='N',
+                        help=f'Conexões keep-alive por host (padrão: {POOL_POR_HOST})')
+    parser.add_argument('--timeout-conexao', type=float, default=TIMEOUT_CONEXAO, metavar='S',
+                        help=f'Timeout para conectar, em segundos (padrão: {TIMEOUT_CONEXAO})')
+    parser.add_argument('--timeout-leitura', type=float, default=TIMEOUT_LEITURA, metavar='S',
+                        help=f'Timeout de leitura, em segundos (padrão: {TIMEOUT_LEITURA})')
+
+
+def opcoes_transporte_args(args):
+    """kwargs de Transporte() a partir dos argumentos de adicionar_argumentos_transporte()"""
+    return {
+        'pool_por_host': args.pool_por_host,
+        'timeout_conexao': args.timeout_conexao,
+        'timeout_leitura': args.timeout_leitura,
+        'http2': args.http2
+    }
@@ -4,62 +4,296 @@
 Script para dividir materiais.xlsx em 6 partes iguais
 """
 
-import pandas as pd
 import math
+import heapq
+import hashlib
+import json
+import unicodedata
 import argparse
 import os
+import sys
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+from historico_custos import ARQUIVO_CUSTOS_PADRAO, carregar_custos, estimar_custos
+from planilhas import carregar_planilha, remover_partes_excedentes, salvar_base_partes, salvar_parte
 
-def dividir_planilha(arquivo_entrada, num_partes=6, pasta_saida='output/partes'):
-    """Divide planilha em N partes iguais"""
+MODOS_DIVISAO = ('sequencial', 'balanceado', 'hash')
+
+# Manifesto da última divisão (usado para o relatório de diferenças)
+ARQUIVO_MANIFESTO = 'divisao.json'
+ARQUIVO_RELATORIO = 'relatorio_divisao.json'
+
+def normalizar_nome(nome_material):
+    """Nome sem acentos, minúsculo e com espaços simples (chave estável do material)"""
+    sem_acentos = unicodedata.normalize('NFKD', str(nome_material))
+    sem_acentos = ''.join(c for c in sem_acentos if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.lower().split())
+
+def parte_por_hash(nome_material, num_partes):
+    """
+    Parte (0..num_partes-1) do material pelo hash do nome normalizado
+    
+    Usa jump consistent hash: a parte não depende da posição da linha na
+    planilha, e ao aumentar o número de partes só ~1/N dos materiais mudam.
+    """
+    digest = hashlib.sha1(normalizar_nome(nome_material).encode('utf-8')).digest()
+    chave = int.from_bytes(digest[:8], 'big')
+    
+    parte, proximo = -1, 0
+    while proximo < num_partes:
+        parte = proximo
+        chave = (chave * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        proximo = int((parte + 1) * (float(1 << 31) / float((chave >> 33) + 1)))
+    return parte
+
+def dividir_hash(nomes_materiais, num_partes):
+    """Agrupa linhas pela parte de hash de cada material (ordem original mantida)"""
+    linhas = [[] for _ in range(num_partes)]
+    for i, nome in enumerate(nomes_materiais):
+        linhas[parte_por_hash(nome, num_partes)].append(i)
+    return linhas
+
+def carregar_manifesto(pasta_saida):
+    """Manifesto da divisão anterior (None se não existir)"""
+    arquivo = os.path.join(pasta_saida, ARQUIVO_MANIFESTO)
+    if not os.path.exists(arquivo):
+        return None
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def comparar_divisoes(manifesto_anterior, partes_novas):
+    """
+    Compara a divisão anterior com a nova
+    
+    partes_novas: {numero_parte (str): [nomes]}
+    Retorna relatório com materiais movidos, adicionados, removidos
+    e a lista de partes cujo conteúdo mudou (precisam ser reprocessadas)
+    """
+    partes_anteriores = manifesto_anterior['partes'] if manifesto_anterior else {}
+    
+    def por_material(partes):
+        return {
+            normalizar_nome(nome): (nome, parte)
+            for parte, nomes in partes.items()
+            for nome in nomes
+        }
+    
+    antes = por_material(partes_anteriores)
+    depois = por_material(partes_novas)
+    
+    movidos = [
+        {'material': depois[chave][0], 'de': int(antes[chave][1]), 'para': int(depois[chave][1])}
+        for chave in depois
+        if chave in antes and antes[chave][1] != depois[chave][1]
+    ]
+    adicionados = [
+        {'material': nome, 'parte': int(parte)}
+        for chave, (nome, parte) in depois.items() if chave not in antes
+    ]
+    removidos = [
+        {'material': nome, 'parte': int(parte)}
+        for chave, (nome, parte) in antes.items() if chave not in depois
+    ]
+    
+    todas_partes = set(partes_anteriores) | set(partes_novas)
+    partes_alteradas = sorted(
+        int(parte) for parte in todas_partes
+        if partes_anteriores.get(parte) != partes_novas.get(parte)
+    )
+    
+    return {
+        'divisao_anterior': manifesto_anterior is not None,
+        'movidos': movidos,
+        'adicionados': adicionados,
+        'removidos': removidos,
+        'partes_alteradas': partes_alteradas
+    }
+
+def dividir_sequencial(total_linhas, num_partes):
+    """Fatias contíguas com o mesmo número de linhas"""
+    linhas_por_parte = math.ceil(total_linhas / num_partes)
+    return [
+        list(range(i * linhas_por_parte, min((i + 1) * linhas_por_parte, total_linhas)))
+        for i in range(num_partes)
+    ]
+
+def dividir_balanceado(custos_estimados, num_partes):
+    """
+    Distribui linhas pelo custo estimado (LPT - Longest Processing Time)
+
+    Materiais mais caros são atribuídos primeiro, sempre à parte com
+    menor carga acumulada. Dentro de cada parte a ordem original é mantida.
+    Retorna (linhas por parte, carga estimada por parte)
+    """
+    ordem = sorted(range(len(custos_estimados)), key=lambda i: custos_estimados[i], reverse=True)
+
+    heap = [(0.0, parte) for parte in range(num_partes)]
+    linhas = [[] for _ in range(num_partes)]
+
+    for i in ordem:
+        carga, parte = heapq.heappop(heap)
+        linhas[parte].append(i)
+        heapq.heappush(heap, (carga + custos_estimados[i], parte))
+
+    cargas = [0.0] * num_partes
+    for carga, parte in heap:
+        cargas[parte] = carga
+
+    return [sorted(l) for l in linhas], cargas
+
+def dividir_planilha(arquivo_entrada, num_partes=6, pasta_saida='output/partes',
+                     modo='sequencial', arquivo_custos=ARQUIVO_CUSTOS_PADRAO, gerar_xlsx=False):
+    """
+    Divide planilha em N partes (iguais, balanceadas por custo ou por hash)
+    
+    Cada parte é um manifesto JSON com as linhas de uma cópia única da
+    planilha (materiais_base.pkl). Com gerar_xlsx=True também grava uma
+    cópia .xlsx de cada parte para consulta manual.
+    """
+    
+    if modo not in MODOS_DIVISAO:
+        raise ValueError(f"Modo de divisão inválido: {modo} (use {', '.join(MODOS_DIVISAO)})")
     
     print(f"📖 Lendo: {arquivo_entrada}")
-    df = pd.read_excel(arquivo_entrada)
+    df = carregar_planilha(arquivo_entrada)
     
     if 'Nome' not in df.columns:
         raise ValueError("Planilha deve ter coluna 'Nome'")
     
     total_linhas = len(df)
-    linhas_por_parte = math.ceil(total_linhas / num_partes)
     
     print(f"📊 Total de materiais: {total_linhas}")
-    print(f"📦 Divisão em {num_partes} partes: ~{linhas_por_parte} materiais por parte")
+    
+    cargas = None
+    if modo == 'balanceado':
+        nomes = [str(n).strip() for n in df['Nome']]
+        custos_estimados, com_historico = estimar_custos(nomes, carregar_custos(arquivo_custos))
+        linhas_partes, cargas = dividir_balanceado(custos_estimados, num_partes)
+        
+        print(f"⚖️  Divisão balanceada em {num_partes} partes (LPT por custo estimado)")
+        print(f"   Histórico de custos: {com_historico}/{total_linhas} materiais ({arquivo_custos})")
+        if com_historico == 0:
+            print(f"   ⚠️  Sem histórico: todos os materiais com o mesmo custo (equivale a partes iguais)")
+    elif modo == 'hash':
+        linhas_partes = dividir_hash([str(n).strip() for n in df['Nome']], num_partes)
+        print(f"🔑 Divisão estável em {num_partes} partes (hash do nome do material)")
+    else:
+        linhas_partes = dividir_sequencial(total_linhas, num_partes)
+        print(f"📦 Divisão em {num_partes} partes: ~{len(linhas_partes[0])} materiais por parte")
     
     # Criar pasta de saída
     if not os.path.exists(pasta_saida):
         os.makedirs(pasta_saida)
         print(f"📁 Pasta criada: {pasta_saida}")
     
+    # Comparar com a divisão anterior
+    partes_novas = {
+        str(i + 1): [str(df['Nome'].iloc[linha]).strip() for linha in linhas_partes[i]]
+        for i in range(num_partes)
+    }
+    manifesto_anterior = carregar_manifesto(pasta_saida)
+    relatorio = comparar_divisoes(manifesto_anterior, partes_novas)
+    
     arquivos_gerados = []
     
+    salvar_base_partes(df, pasta_saida)
+    
     for i in range(num_partes):
-        inicio = i * linhas_por_parte
-        fim = min((i + 1) * linhas_por_parte, total_linhas)
-        
-        df_parte = df.iloc[inicio:fim].copy()
+        arquivo_saida, _ = salvar_parte(pasta_saida, i + 1, linhas_partes[i])
+        arquivos_gerados.append(arquivo_saida)
         
-        # Resetar índice
-        df_parte.reset_index(drop=True, inplace=True)
+        detalhe_carga = f" (~{cargas[i] / 60:.1f} min estimados)" if cargas else ""
         
-        arquivo_saida = os.path.join(pasta_saida, f'materiais_parte_{i+1}.xlsx')
-        df_parte.to_excel(arquivo_saida, index=False)
+        # Cópia em Excel só para consulta manual (partes sem alteração são mantidas)
+        if gerar_xlsx:
+            arquivo_xlsx = os.path.join(pasta_saida, f'materiais_parte_{i+1}.xlsx')
+            if (i + 1) in relatorio['partes_alteradas'] or not os.path.exists(arquivo_xlsx):
+                df.iloc[linhas_partes[i]].reset_index(drop=True).to_excel(arquivo_xlsx, index=False)
         
-        arquivos_gerados.append(arquivo_saida)
-        
-        print(f"   ✅ Parte {i+1}: {len(df_parte)} materiais → {arquivo_saida}")
+        if (i + 1) not in relatorio['partes_alteradas']:
+            print(f"   ⏭️  Parte {i+1}: {len(linhas_partes[i])} materiais{detalhe_carga} (sem alterações)")
+        else:
+            print(f"   ✅ Parte {i+1}: {len(linhas_partes[i])} materiais{detalhe_carga} → {arquivo_saida}")
+    
+    # Partes de uma divisão anterior com mais partes apontariam para linhas da nova base
+    removidas = remover_partes_excedentes(pasta_saida, num_partes)
+    if removidas:
+        print(f"   🗑️  Partes {removidas} não existem mais nesta divisão: arquivos apagados")
+    
+    # Salvar manifesto e relatório de diferenças
+    manifesto = {
+        'modo': modo,
+        'num_partes': num_partes,
+        'entrada': os.path.abspath(arquivo_entrada),
+        'gerado_em': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'partes': partes_novas
+    }
+    with open(os.path.join(pasta_saida, ARQUIVO_MANIFESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    
+    arquivo_relatorio = os.path.join(pasta_saida, ARQUIVO_RELATORIO)
+    with open(arquivo_relatorio, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
     
     print(f"\n🎉 {num_partes} arquivos gerados em '{pasta_saida}/'")
+    imprimir_relatorio(relatorio, num_partes, arquivo_relatorio)
     
     return arquivos_gerados
 
+def imprimir_relatorio(relatorio, num_partes, arquivo_relatorio):
+    """Resumo das diferenças em relação à divisão anterior"""
+    if not relatorio['divisao_anterior']:
+        return
+    
+    print(f"\n🔀 Diferenças em relação à divisão anterior:")
+    print(f"   • Materiais movidos: {len(relatorio['movidos'])}")
+    print(f"   • Materiais adicionados: {len(relatorio['adicionados'])}")
+    print(f"   • Materiais removidos: {len(relatorio['removidos'])}")
+    
+    for movido in relatorio['movidos'][:10]:
+        print(f"      ↪ {movido['material'][:60]} (parte {movido['de']} → {movido['para']})")
+    if len(relatorio['movidos']) > 10:
+        print(f"      ... e mais {len(relatorio['movidos']) - 10}")
+    
+    alteradas = [p for p in relatorio['partes_alteradas'] if p <= num_partes]
+    obsoletas = [p for p in relatorio['partes_alteradas'] if p > num_partes]
+    if not alteradas:
+        print(f"\n✅ Nenhuma parte mudou: nada a reprocessar")
+    else:
+        print(f"\n♻️  Partes a reprocessar: {alteradas}")
+    if obsoletas:
+        print(f"   🗑️  Partes {obsoletas} não existem mais (apague as páginas delas em output/paginas_html)")
+    print(f"   Relatório completo: {arquivo_relatorio}")
+
 def main():
     parser = argparse.ArgumentParser(
-        description='Divide materiais.xlsx em partes iguais',
+        description='Divide materiais.xlsx em partes (iguais ou balanceadas por custo)',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Exemplos:
   python3 dividir_planilha.py                    # Divide em 6 partes (padrão)
   python3 dividir_planilha.py -n 4               # Divide em 4 partes
   python3 dividir_planilha.py -i dados.xlsx -n 10  # Arquivo customizado
+  python3 dividir_planilha.py -n 10 --modo balanceado  # Balancear pelo custo das execuções anteriores
+  python3 dividir_planilha.py -n 10 --modo hash        # Partes estáveis entre edições da planilha
+
+Modos de divisão:
+  sequencial   Fatias contíguas com o mesmo número de materiais (padrão)
+  balanceado   Distribui pelo custo estimado (tempo de busca + nº de produtos)
+               registrado nas execuções anteriores, para que as partes
+               terminem juntas quando processadas em paralelo
+  hash         Parte definida pelo hash do nome normalizado do material:
+               inserir ou remover linhas não move os demais materiais
+
+A cada divisão é salvo '{pasta}/divisao.json' e um relatório de diferenças
+'{pasta}/relatorio_divisao.json' (materiais movidos e partes a reprocessar).
+
+As partes são gravadas como 'materiais_parte_N.json' (linhas de uma cópia
+única da planilha, 'materiais_base.pkl'), muito mais rápidas que xlsx.
+Use --xlsx para gravar também uma cópia em Excel de cada parte.
         """
     )
     
@@ -69,11 +303,17 @@ Exemplos:
                         help='Número de partes (padrão: 6)')
     parser.add_argument('-o', '--pasta-saida', default='output/partes',
                         help='Pasta de saída (padrão: output/partes)')
+    parser.add_argument('-m', '--modo', choices=MODOS_DIVISAO, default='sequencial',
+                        help='Modo de divisão (padrão: sequencial)')
+    parser.add_argument('--custos', default=ARQUIVO_CUSTOS_PADRAO,
+                        help=f'Histórico de custos para o modo balanceado (padrão: {ARQUIVO_CUSTOS_PADRAO})')
+    parser.add_argument('--xlsx', action='store_true',
+                        help='Gravar também uma cópia .xlsx de cada parte (consulta manual)')
     
     args = parser.parse_args()
     
     try:
-        dividir_planilha(args.entrada, args.num_partes, args.pasta_saida)
+        dividir_planilha(args.entrada, args.num_partes, args.pasta_saida, args.modo, args.custos, args.xlsx)
         return 0
     except Exception as e:
         print(f"❌ Erro: {e}")
@@ -7,6 +7,8 @@ Gera página índice (index.html) para as páginas HTML já criadas
 import os
 import sys
 from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+from paginas_comprimidas import gravar_pagina
 
 def gerar_pagina_indice(pasta_saida='output/paginas_html'):
     """Gera página índice com links para todas as páginas HTML"""
@@ -213,8 +215,7 @@ def gerar_pagina_indice(pasta_saida='output/paginas_html'):
     
     # Salvar arquivo
     arquivo_indice = os.path.join(pasta_saida, 'index.html')
-    with open(arquivo_indice, 'w', encoding='utf-8') as f:
-        f.write(html_indice)
+    gravar_pagina(arquivo_indice, html_indice)
     
     print(f"✅ Página índice gerada: {arquivo_indice}")
     
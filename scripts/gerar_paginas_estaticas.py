@@ -4,103 +4,303 @@
 Processa partes da planilha e gera páginas HTML estáticas
 """
 
-import pandas as pd
+import hashlib
 import json
 import os
 import argparse
+import statistics
+import time
 from datetime import datetime
 import sys
-import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
-from busca_materiais_planilha_inteligente import BuscadorInteligente
+from historico_custos import ARQUIVO_CUSTOS_PADRAO, chave_material, registrar_custos
+from historico_precos import ARQUIVO_HISTORICO_PADRAO, LIMIAR_VARIACAO_PADRAO
+from remocoes import ARQUIVO_REMOCOES_PADRAO, carregar_remocoes, removidos_por_material
+from modelo_relevancia import ARQUIVO_MODELO_PADRAO, ModeloRelevancia
+from planilhas import ler_tabela, listar_arquivos_partes, numero_da_parte
+from produto import catalogo_para_json, hash_produtos_pagina
+from paginas_comprimidas import gravar_pagina
+from metricas import MedidorTempos, arquivo_tempos_padrao
+from perfil import PASTA_LOGS_PADRAO, executar_com_perfil
+from configuracao_log import adicionar_argumentos_log, configurar_logging_args
+from transporte import adicionar_argumentos_transporte, opcoes_transporte_args
 
-def gerar_pagina_estatica(arquivo_entrada, arquivo_saida_html, numero_parte=None):
+def gerar_pagina_estatica(arquivo_entrada, arquivo_saida_html, numero_parte=None,
+                          arquivo_custos=ARQUIVO_CUSTOS_PADRAO, arquivo_tempos=None, limite=None,
+                          opcoes_transporte=None, usar_cache=True,
+                          arquivo_historico=ARQUIVO_HISTORICO_PADRAO, limiar_variacao=LIMIAR_VARIACAO_PADRAO,
+                          arquivo_remocoes=ARQUIVO_REMOCOES_PADRAO, arquivo_modelo=ARQUIVO_MODELO_PADRAO):
     """
     Processa planilha e gera página HTML estática com dados embutidos
+    
+    O tempo de busca (sem as esperas de rate limit, backoff e disjuntor) e o
+    nº de produtos de cada material são registrados em arquivo_custos (usado
+    por dividir_planilha.py --modo balanceado; partes em paralelo não apagam
+    as medições umas das outras).
+    Os tempos de cada etapa vão para arquivo_tempos (JSONL, padrão
+    output/logs/tempos_parte_<N>_<data>.jsonl) e são resumidos no final.
+    Com limite, processa só os N primeiros materiais; essa execução parcial
+    não entra em arquivo_custos nem no histórico de preços.
+    Materiais que falharam (rede, 429, captcha, layout) são buscados de novo
+    no fim, antes de gerar a página (tentativas.FilaAdiada).
+    opcoes_transporte são os kwargs de transporte.Transporte (pool, timeouts, HTTP/2).
+    Com usar_cache, as buscas são condicionais (cache_buscas.CacheBuscas) e,
+    se o conteúdo da página não mudou (mesmo hash), a página existente é mantida.
+    Os resultados são acrescentados ao histórico de preços (arquivo_historico,
+    None desativa) e materiais cuja mediana variou ao menos limiar_variacao %
+    desde a execução anterior ficam destacados na página.
+    Produtos já removidos pelos validadores (arquivo_remocoes, importado com
+    importar_remocoes.py; None desativa) não entram na página, nem os que o
+    modelo de relevância (arquivo_modelo, treinado com
+    treinar_modelo_relevancia.py; None desativa) considera improváveis.
     """
     print(f"\n{'='*80}")
     print(f"🔄 Processando: {arquivo_entrada}")
     print(f"{'='*80}\n")
     
-    # Ler planilha
-    df = pd.read_excel(arquivo_entrada)
+    # Ler planilha (parte .json, .pkl, .parquet ou .xlsx)
+    df = ler_tabela(arquivo_entrada)
     
     if 'Nome' not in df.columns:
         raise ValueError("Planilha deve ter coluna 'Nome'")
     
-    # Criar buscador
-    buscador = BuscadorInteligente()
+    if limite:
+        df = df.head(limite)
+    
+    # Importado aqui: requests, BeautifulSoup e o buscador só carregam quando a busca começa
+    from busca_materiais_planilha_inteligente import BuscadorInteligente
+    from transporte import Transporte
+    from tentativas import FilaAdiada
+    from cache_buscas import CacheBuscas
+    
+    # Criar buscador (com medição de tempo por etapa)
+    if arquivo_tempos is None:
+        arquivo_tempos = arquivo_tempos_padrao(f'tempos_parte_{numero_parte}' if numero_parte else 'tempos')
+    medidor = MedidorTempos(arquivo_tempos)
+    transporte = Transporte(**(opcoes_transporte or {}))
+    cache = CacheBuscas() if usar_cache else None
+    remocoes = carregar_remocoes(arquivo_remocoes)
+    buscador = BuscadorInteligente(medidor=medidor, transporte=transporte, cache=cache,
+                                   remocoes=removidos_por_material(remocoes),
+                                   modelo=ModeloRelevancia.carregar(arquivo_modelo))
     
     # Processar cada material
     materiais_dados = []
+    resultados = []
+    medicoes_custo = []
+    fila = FilaAdiada()
     
     for idx, row in df.iterrows():
         nome_material = str(row['Nome']).strip()
         
-        print(f"🔍 [{idx+1}/{len(df)}] {nome_material}")
+        print(f"🔍 [{idx+1}/{len(df)}] {nome_material}{buscador.disjuntor.indicador()}")
         
         # Buscar produtos
+        medidor.iniciar_material(nome_material)
+        inicio = time.perf_counter()
         resultado = buscador.buscar_produtos_material(nome_material)
+        # Custo do material: busca, parse e pontuação, sem as esperas (2s entre requisições,
+        # pausas longas, backoff e disjuntor caem em qualquer material)
+        tempo_busca = time.perf_counter() - inicio - medidor.tempo_em_espera()
         
-        # Preparar dados
-        produtos = []
-        if resultado.get('produtos'):
-            for p in resultado['produtos']:
-                produtos.append({
-                    'nome': p['nome'],
-                    'preco': p['preco'],
-                    'link': p.get('link', ''),
-                    'score_relevancia': p.get('score_relevancia', 0)
-                })
-        
-        # Calcular preço médio
-        preco_medio = None
-        if produtos:
-            precos = [p['preco'] for p in produtos if p['preco']]
-            if precos:
-                preco_medio = sum(precos) / len(precos)
-        
-        material_info = {
-            'nome': nome_material,
-            'total_produtos': len(produtos),
-            'preco_medio': preco_medio,
-            'produtos': produtos
-        }
-        
+        material_info = dados_material(nome_material, resultado)
         materiais_dados.append(material_info)
+        resultados.append(resultado)
+        medidor.finalizar_material(status=resultado.get('status'), classe=resultado.get('classe'),
+                                   tentativas=resultado.get('tentativas'),
+                                   produtos=material_info['total_produtos'])
+        
+        if resultado.get('status') != 'erro' and not limite:
+            medicoes_custo.append((nome_material, max(tempo_busca, 0.0), material_info['total_produtos']))
         
-        print(f"   ✅ {len(produtos)} produtos encontrados\n")
+        fila.adiar_se_falhou(len(materiais_dados) - 1, nome_material, resultado)
+        imprimir_resultado(resultado, material_info)
+    
+    # Materiais adiados: nova tentativa antes de montar a página
+    for posicao, nome_material, resultado in buscador.buscar_adiados(fila):
+        print(f"🔁 {nome_material}{buscador.disjuntor.indicador()}")
+        materiais_dados[posicao] = dados_material(nome_material, resultado)
+        resultados[posicao] = resultado
+        imprimir_resultado(resultado, materiais_dados[posicao])
+    
+    if not limite:
+        registrar_custos(medicoes_custo, arquivo_custos)
+    
+    if arquivo_historico and not limite:
+        marcar_variacoes(materiais_dados, resultados, arquivo_historico, limiar_variacao,
+                         arquivo_entrada, numero_parte)
+    
+    with medidor.etapa('render'):
+        gerada = renderizar_pagina(materiais_dados, arquivo_saida_html, numero_parte, reaproveitar=bool(cache))
+    
+    print(f"\n{'='*80}")
+    if gerada:
+        print(f"✅ Página gerada: {arquivo_saida_html}")
+    else:
+        print(f"♻️  Conteúdo igual ao da página existente: página mantida ({arquivo_saida_html})")
+    print(f"{'='*80}\n")
+    
+    medidor.imprimir_resumo()
+    medidor.fechar()
+    transporte.imprimir_resumo()
+    transporte.fechar()
+    buscador.disjuntor.imprimir_resumo()
+    if cache:
+        cache.imprimir_resumo()
+    buscador.imprimir_resumo_catalogo()
+    
+    return arquivo_saida_html
+
+def marcar_variacoes(materiais_dados, resultados, arquivo_historico, limiar_variacao,
+                     origem=None, numero_parte=None):
+    """Grava a execução no histórico de preços e marca 'variacao' nos materiais alterados"""
+    from historico_precos import HistoricoPrecos
+    
+    historico = HistoricoPrecos(arquivo_historico)
+    try:
+        execucao_id = historico.registrar_execucao(
+            [(m['nome'], resultado) for m, resultado in zip(materiais_dados, resultados)],
+            origem=origem, parte=numero_parte
+        )
+        variacoes = {v['material']: v for v in historico.variacoes(limiar_variacao, execucao_id)}
+    finally:
+        historico.fechar()
+    
+    for material_info in materiais_dados:
+        variacao = variacoes.get(chave_material(material_info['nome']))
+        if variacao:
+            material_info['variacao'] = {
+                'anterior': variacao['anterior'],
+                'atual': variacao['atual'],
+                'percentual': round(variacao['percentual'], 1)
+            }
+    
+    print(f"🗃️  Histórico de preços: execução {execucao_id} em {arquivo_historico}")
+    if variacoes:
+        print(f"📈 {len(variacoes)} materiais com mediana variando ≥ {limiar_variacao:g}% desde a execução anterior")
+
+def arquivo_hash_pagina(arquivo_saida_html):
+    """Arquivo ao lado da página com o hash do conteúdo com que ela foi gerada"""
+    return arquivo_saida_html + '.hash'
+
+def pagina_atualizada(arquivo_saida_html, hash_pagina):
+    """True se a página existe e foi gerada com o mesmo conteúdo (hash_pagina)"""
+    if not os.path.exists(arquivo_saida_html):
+        return False
+    try:
+        with open(arquivo_hash_pagina(arquivo_saida_html), 'r', encoding='utf-8') as f:
+            return f.read().strip() == hash_pagina
+    except OSError:
+        return False
+
+def dados_material(nome_material, resultado):
+    """Entrada de um material nos dados da página"""
+    # Produtos seguem como ItemMaterial até a serialização da página
+    produtos = resultado.get('produtos') or []
+    
+    # Preço médio e resumo_precos são calculados na renderização: os preços do
+    # catálogo ainda podem mudar com as buscas dos materiais seguintes
+    return {
+        'nome': nome_material,
+        'total_produtos': len(produtos),
+        'preco_medio': None,
+        'inalterado_desde': resultado.get('inalterado_desde'),
+        'produtos': produtos
+    }
+
+def resumo_precos(precos):
+    """
+    Estatísticas que a página mostra para o material, já calculadas
+    
+    Mesmas definições do calcularEstatisticas do template (todos os preços,
+    desvio padrão populacional, a menor das modas em caso de empate), para a
+    página só recalcular os materiais que tiveram produtos removidos.
+    None sem preços.
+    """
+    if not precos:
+        return None
+    return {
+        'quantidade': len(precos),
+        'soma': round(sum(precos), 2),
+        'minimo': min(precos),
+        'maximo': max(precos),
+        'media': round(statistics.fmean(precos), 4),
+        'mediana': statistics.median(precos),
+        'moda': min(statistics.multimode(precos)),
+        'desvio_padrao': round(statistics.pstdev(precos), 4)
+    }
+
+def imprimir_resultado(resultado, material_info):
+    """Linha de progresso do material"""
+    if resultado.get('status') == 'erro':
+        print(f"   ❌ Falhou ({resultado.get('classe')}, {resultado.get('tentativas')} tentativas)\n")
+    else:
+        print(f"   ✅ {material_info['total_produtos']} produtos encontrados\n")
+
+def caminho_template():
+    """Template das páginas de parte"""
+    return os.path.join(os.path.dirname(__file__), '..', 'templates', 'pagina_estatica.html')
+
+def renderizar_pagina(materiais_dados, arquivo_saida_html, numero_parte=None, reaproveitar=False):
+    """
+    Preenche o template com os dados dos materiais e grava a página HTML
     
+    O hash do template, do título e dos dados embutidos fica em
+    <página>.hash; com reaproveitar, uma página gerada com o mesmo hash é
+    mantida. Devolve True se a página foi gravada.
+    """
     # Ler template HTML
-    template_path = os.path.join(os.path.dirname(__file__), '..', 'templates', 'pagina_estatica.html')
-    with open(template_path, 'r', encoding='utf-8') as f:
+    with open(caminho_template(), 'r', encoding='utf-8') as f:
         template_html = f.read()
     
-    # Preparar dados JSON
-    dados_json = json.dumps(materiais_dados, ensure_ascii=False, indent=2)
+    # Preços finais do catálogo: preço médio e estatísticas que a página mostra
+    for material_info in materiais_dados:
+        precos = [p.preco for p in material_info['produtos'] if p.preco]
+        material_info['preco_medio'] = sum(precos) / len(precos) if precos else None
+        material_info['resumo_precos'] = resumo_precos(precos)
+    
+    # Preparar dados JSON (única serialização dos produtos): cada anúncio uma vez
+    # no catálogo, os materiais só com [id, score]
+    catalogo, materiais = catalogo_para_json(materiais_dados)
+    catalogo_json = json.dumps(catalogo, ensure_ascii=False, separators=(',', ':'))
+    dados_json = json.dumps(materiais, ensure_ascii=False, separators=(',', ':'))
+    # Chaves dos removidos por posição (formatos anteriores), convertidos para ids pela página
+    hash_conteudo = hash_produtos_pagina(materiais)
+    hash_anterior = hashlib.sha1(f'{catalogo_json}\n{dados_json}'.encode('utf-8')).hexdigest()[:16]
     
-    # Substituir placeholders
     titulo = f"Busca de Preços - Parte {numero_parte}" if numero_parte else "Busca de Preços"
+    
+    # Tudo o que vai na página, menos a data: re-divisões, remoções, modelo e
+    # mudanças do template ou dos campos embutidos mudam o hash
+    hash_pagina = hashlib.sha1('\n'.join((template_html, titulo, catalogo_json, dados_json))
+                               .encode('utf-8')).hexdigest()
+    if reaproveitar and pagina_atualizada(arquivo_saida_html, hash_pagina):
+        return False
+    
+    # Substituir placeholders
     data_geracao = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
     
     html_final = template_html.replace('{{TITULO}}', titulo)
     html_final = html_final.replace('{{DATA_GERACAO}}', data_geracao)
     html_final = html_final.replace('{{TOTAL_MATERIAIS}}', str(len(materiais_dados)))
+    html_final = html_final.replace('{{CATALOGO_JSON}}', catalogo_json)
     html_final = html_final.replace('{{DADOS_JSON}}', dados_json)
+    html_final = html_final.replace('{{HASH_CONTEUDO}}', hash_conteudo)
+    html_final = html_final.replace('{{HASH_ANTERIOR}}', hash_anterior)
     
-    # Salvar HTML
-    with open(arquivo_saida_html, 'w', encoding='utf-8') as f:
-        f.write(html_final)
-    
-    print(f"\n{'='*80}")
-    print(f"✅ Página gerada: {arquivo_saida_html}")
-    print(f"{'='*80}\n")
-    
-    return arquivo_saida_html
+    # Salvar HTML (e as cópias .gz/.br para servir_paginas.py)
+    gravar_pagina(arquivo_saida_html, html_final)
+    with open(arquivo_hash_pagina(arquivo_saida_html), 'w', encoding='utf-8') as f:
+        f.write(hash_pagina)
+    return True
 
-def processar_todas_partes(pasta_partes='output/partes', pasta_saida='output/paginas_html'):
+def processar_todas_partes(pasta_partes='output/partes', pasta_saida='output/paginas_html', limite=None,
+                           opcoes_transporte=None, usar_cache=True, limiar_variacao=LIMIAR_VARIACAO_PADRAO,
+                           arquivo_remocoes=ARQUIVO_REMOCOES_PADRAO, arquivo_modelo=ARQUIVO_MODELO_PADRAO):
     """
     Processa todas as partes e gera páginas HTML
+    (com limite, só os N primeiros materiais de cada parte; essas páginas
+    parciais vão para output/logs/perfil_pagina_parte_<N>.html, sem índice)
     """
     print(f"\n{'='*80}")
     print(f"🚀 PROCESSAMENTO DE TODAS AS PARTES")
@@ -112,10 +312,7 @@ def processar_todas_partes(pasta_partes='output/partes', pasta_saida='output/pag
         print(f"📁 Pasta criada: {pasta_saida}\n")
     
     # Encontrar arquivos de partes
-    arquivos_partes = sorted([
-        f for f in os.listdir(pasta_partes) 
-        if f.startswith('materiais_parte_') and f.endswith('.xlsx')
-    ])
+    arquivos_partes = listar_arquivos_partes(pasta_partes)
     
     if not arquivos_partes:
         print(f"❌ Nenhum arquivo encontrado em '{pasta_partes}/'")
@@ -127,31 +324,36 @@ def processar_todas_partes(pasta_partes='output/partes', pasta_saida='output/pag
         print(f"   • {f}")
     print()
     
-    # Processar cada parte
+    # Processar cada parte (execução parcial de profiling não substitui as páginas reais)
     paginas_geradas = []
+    pasta_paginas, prefixo = (PASTA_LOGS_PADRAO, 'perfil_') if limite else (pasta_saida, '')
     
     for arquivo in arquivos_partes:
         # Extrair número da parte
-        numero_parte = arquivo.replace('materiais_parte_', '').replace('.xlsx', '')
+        numero_parte = numero_da_parte(arquivo)
         
         arquivo_entrada = os.path.join(pasta_partes, arquivo)
-        arquivo_saida = os.path.join(pasta_saida, f'pagina_parte_{numero_parte}.html')
+        arquivo_saida = os.path.join(pasta_paginas, f'{prefixo}pagina_parte_{numero_parte}.html')
         
         try:
-            gerar_pagina_estatica(arquivo_entrada, arquivo_saida, numero_parte)
+            gerar_pagina_estatica(arquivo_entrada, arquivo_saida, numero_parte, limite=limite,
+                                  opcoes_transporte=opcoes_transporte, usar_cache=usar_cache,
+                                  limiar_variacao=limiar_variacao, arquivo_remocoes=arquivo_remocoes,
+                                  arquivo_modelo=arquivo_modelo)
             paginas_geradas.append(arquivo_saida)
         except Exception as e:
             print(f"❌ Erro ao processar {arquivo}: {e}\n")
             import traceback
             traceback.print_exc()
     
-    # Gerar página índice
-    gerar_pagina_indice(paginas_geradas, pasta_saida)
+    # Gerar página índice (só com as páginas completas)
+    if not limite:
+        gerar_pagina_indice(paginas_geradas, pasta_saida)
     
     print(f"\n{'='*80}")
     print(f"🎉 PROCESSAMENTO CONCLUÍDO!")
     print(f"{'='*80}")
-    print(f"\n📊 {len(paginas_geradas)} páginas geradas em '{pasta_saida}/':\n")
+    print(f"\n📊 {len(paginas_geradas)} páginas geradas em '{pasta_paginas}/':\n")
     for p in paginas_geradas:
         print(f"   ✅ {os.path.basename(p)}")
     print(f"\n🌐 Abra qualquer página HTML no navegador!")
@@ -296,10 +498,16 @@ def main():
         epilog="""
 Exemplos:
   # Processar uma parte específica
-  python3 gerar_paginas_estaticas.py -i partes/materiais_parte_1.xlsx -o pagina1.html
+  python3 gerar_paginas_estaticas.py -i output/partes/materiais_parte_1.json -o pagina1.html
   
   # Processar todas as partes automaticamente
   python3 gerar_paginas_estaticas.py --todas
+  
+  # Profiling dos 20 primeiros materiais (relatórios em output/logs/)
+  python3 gerar_paginas_estaticas.py -i output/partes/materiais_parte_1.json -o perfil.html --profile --profile-limite 20
+  
+  # HTTP/2 e timeouts próprios (requer: pip install "httpx[http2]")
+  python3 gerar_paginas_estaticas.py --todas --http2 --timeout-conexao 3 --timeout-leitura 20
         """
     )
     
@@ -312,16 +520,49 @@ Exemplos:
                         help='Pasta com as partes (padrão: output/partes)')
     parser.add_argument('--pasta-saida', default='output/paginas_html',
                         help='Pasta de saída (padrão: output/paginas_html)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Executar com cProfile + tracemalloc (relatórios em output/logs/)')
+    parser.add_argument('--profile-limite', type=int, metavar='N',
+                        help='Com --profile, processar só os N primeiros materiais')
+    parser.add_argument('--sem-cache', action='store_true',
+                        help='Buscar tudo de novo, sem requisições condicionais nem resultados reaproveitados')
+    parser.add_argument('--variacao', type=float, default=LIMIAR_VARIACAO_PADRAO, metavar='PCT',
+                        help=f'Destacar materiais cuja mediana variou ao menos PCT%% (padrão: {LIMIAR_VARIACAO_PADRAO:g})')
+    parser.add_argument('--sem-remocoes', action='store_true',
+                        help=f'Não excluir os produtos removidos pelos validadores ({ARQUIVO_REMOCOES_PADRAO})')
+    parser.add_argument('--sem-modelo', action='store_true',
+                        help=f'Não descartar produtos pelo modelo de relevância ({ARQUIVO_MODELO_PADRAO})')
+    
+    adicionar_argumentos_log(parser)
+    adicionar_argumentos_transporte(parser)
     
     args = parser.parse_args()
     
+    configurar_logging_args(args)
+    
+    limite = args.profile_limite if args.profile else None
+    arquivo_remocoes = None if args.sem_remocoes else ARQUIVO_REMOCOES_PADRAO
+    arquivo_modelo = None if args.sem_modelo else ARQUIVO_MODELO_PADRAO
+    opcoes_transporte = opcoes_transporte_args(args)
+    
+    def executar(funcao, *argumentos, **opcoes):
+        if args.profile:
+            return executar_com_perfil(funcao, *argumentos, nome='perfil_gerar_paginas', **opcoes)
+        return funcao(*argumentos, **opcoes)
+    
     try:
         if args.todas:
             # Processar todas as partes
-            processar_todas_partes(args.pasta_partes, args.pasta_saida)
+            executar(processar_todas_partes, args.pasta_partes, args.pasta_saida, limite=limite,
+                     opcoes_transporte=opcoes_transporte, usar_cache=not args.sem_cache,
+                     limiar_variacao=args.variacao, arquivo_remocoes=arquivo_remocoes,
+                     arquivo_modelo=arquivo_modelo)
         elif args.entrada and args.saida:
             # Processar uma parte específica
-            gerar_pagina_estatica(args.entrada, args.saida, args.numero)
+            executar(gerar_pagina_estatica, args.entrada, args.saida, args.numero, limite=limite,
+                     opcoes_transporte=opcoes_transporte, usar_cache=not args.sem_cache,
+                     limiar_variacao=args.variacao, arquivo_remocoes=arquivo_remocoes,
+                     arquivo_modelo=arquivo_modelo)
         else:
             print("❌ Erro: Especifique --todas ou forneça -i e -o")
             parser.print_help()
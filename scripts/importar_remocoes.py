@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Importa os produtos removidos pelos validadores para output/remocoes.json
+
+Nas próximas buscas esses produtos não entram nos resultados nem nas páginas.
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+from historico_custos import chave_material
+from remocoes import (ARQUIVO_REMOCOES_PADRAO, carregar_remocoes, importar_exportacao, importar_json,
+                      salvar_remocoes)
+
+def importar_arquivos(remocoes, arquivos):
+    """Importa cada arquivo (.json do botão "Baixar Removidos" ou .xlsx exportado); devolve o nº de novos"""
+    total = 0
+    for arquivo in arquivos:
+        extensao = os.path.splitext(arquivo)[1].lower()
+        try:
+            if extensao == '.json':
+                novos = importar_json(remocoes, arquivo)
+            elif extensao == '.xlsx':
+                novos = importar_exportacao(remocoes, arquivo)
+            else:
+                print(f"   ⚠️  {os.path.basename(arquivo)}: formato não suportado (use .json ou .xlsx)")
+                continue
+        except (OSError, ValueError) as e:
+            print(f"   ❌ {os.path.basename(arquivo)}: {e}")
+            continue
+        print(f"   📥 {os.path.basename(arquivo)}: {novos} remoções novas")
+        total += novos
+    return total
+
+def mostrar_resumo(remocoes):
+    """Materiais com mais produtos removidos"""
+    por_material = sorted(((len(p), m) for m, p in remocoes.items() if p), reverse=True)
+    total = sum(n for n, _ in por_material)
+    print(f"\n🚫 {total} produtos removidos em {len(por_material)} materiais\n")
+    for quantidade, material in por_material[:20]:
+        print(f"   {quantidade:>4}  {material}")
+    if len(por_material) > 20:
+        print(f"   ... e mais {len(por_material) - 20} materiais")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Importa as remoções dos validadores para as próximas buscas',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Fontes aceitas:
+  - JSON do botão "⬇️ Baixar Removidos" das páginas
+  - Planilhas do "📊 Exportar para Excel" (coluna Removidos_JSON)
+
+As remoções se acumulam em {ARQUIVO_REMOCOES_PADRAO} e valem para as próximas
+execuções de processar_parte.py.
+
+Exemplos:
+  # Importar o JSON baixado de uma página
+  python3 importar_remocoes.py ~/Downloads/removidos_*.json
+
+  # Importar das planilhas exportadas
+  python3 importar_remocoes.py output/exportacoes/*.xlsx
+
+  # Ver o que já foi removido
+  python3 importar_remocoes.py --resumo
+
+  # Voltar a mostrar os produtos de um material (já na próxima atualização)
+  python3 importar_remocoes.py --desfazer "ATLETISMO - Apito"
+        """
+    )
+
+    parser.add_argument('arquivos', nargs='*', help='Arquivos .json ou .xlsx com as remoções')
+    parser.add_argument('--arquivo', default=ARQUIVO_REMOCOES_PADRAO,
+                        help=f'Arquivo das remoções (padrão: {ARQUIVO_REMOCOES_PADRAO})')
+    parser.add_argument('--resumo', action='store_true', help='Mostrar os materiais com mais remoções')
+    parser.add_argument('--desfazer', metavar='MATERIAL', action='append', default=[],
+                        help='Esquecer as remoções de um material (pode repetir)')
+
+    args = parser.parse_args()
+
+    if not args.arquivos and not args.desfazer and not args.resumo:
+        parser.print_help()
+        return 1
+
+    remocoes = carregar_remocoes(args.arquivo)
+
+    if args.arquivos:
+        print(f"\n📥 Importando {len(args.arquivos)} arquivo(s)...")
+        novos = importar_arquivos(remocoes, args.arquivos)
+        print(f"\n✅ {novos} remoções novas")
+
+    for material in args.desfazer:
+        removidos = remocoes.pop(chave_material(material), None)
+        if removidos:
+            print(f"↩️  {material}: {len(removidos)} remoções esquecidas")
+        else:
+            print(f"⚠️  {material}: nenhuma remoção registrada")
+
+    if args.arquivos or args.desfazer:
+        salvar_remocoes(remocoes, args.arquivo)
+        print(f"💾 {args.arquivo}")
+
+    if args.resumo:
+        mostrar_resumo(remocoes)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
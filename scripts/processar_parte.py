@@ -3,24 +3,23 @@
 """
 Processa UMA parte específica da planilha
 Permite processar parte 1, depois parte 2, etc.
+
+Só módulos leves são importados no início: pandas, requests, BeautifulSoup
+e o buscador carregam apenas quando uma parte vai de fato ser processada,
+então menu, --status e listagens abrem instantaneamente.
 """
 
 import os
 import sys
 import argparse
-from gerar_paginas_estaticas import gerar_pagina_estatica
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+from planilhas import caminho_parte, listar_arquivos_partes
+from configuracao_log import adicionar_argumentos_log, configurar_logging_args
+from transporte import adicionar_argumentos_transporte, opcoes_transporte_args
 
 def listar_partes_disponiveis(pasta_partes='output/partes'):
     """Lista as partes disponíveis"""
-    if not os.path.exists(pasta_partes):
-        return []
-    
-    arquivos = sorted([
-        f for f in os.listdir(pasta_partes)
-        if f.startswith('materiais_parte_') and f.endswith('.xlsx')
-    ])
-    
-    return arquivos
+    return listar_arquivos_partes(pasta_partes)
 
 def verificar_partes_processadas(pasta_saida='output/paginas_html'):
     """Verifica quais partes já foram processadas"""
@@ -40,18 +39,28 @@ def verificar_partes_processadas(pasta_saida='output/paginas_html'):
     
     return sorted(partes_processadas)
 
-def processar_parte(numero_parte, pasta_partes='output/partes', pasta_saida='output/paginas_html'):
-    """Processa uma parte específica"""
+def processar_parte(numero_parte, pasta_partes='output/partes', pasta_saida='output/paginas_html',
+                    perfil=False, limite_perfil=None, opcoes_transporte=None, usar_cache=True,
+                    usar_remocoes=True, usar_modelo=True):
+    """
+    Processa uma parte específica
+    
+    Com perfil=True roda sob cProfile/tracemalloc (relatórios em output/logs/).
+    Com limite_perfil processa só os N primeiros materiais e grava a página
+    em output/logs/, sem substituir a página real da parte.
+    opcoes_transporte são os kwargs de transporte.Transporte (pool, timeouts, HTTP/2).
+    Com usar_cache=False busca tudo de novo, sem o cache de buscas.
+    """
     
     print(f"\n{'='*80}")
     print(f"🔄 PROCESSANDO PARTE {numero_parte}")
     print(f"{'='*80}\n")
     
     # Verificar se a parte existe
-    arquivo_entrada = os.path.join(pasta_partes, f'materiais_parte_{numero_parte}.xlsx')
+    arquivo_entrada = caminho_parte(pasta_partes, numero_parte)
     
-    if not os.path.exists(arquivo_entrada):
-        print(f"❌ Erro: Arquivo não encontrado: {arquivo_entrada}")
+    if arquivo_entrada is None:
+        print(f"❌ Erro: Parte {numero_parte} não encontrada em '{pasta_partes}/'")
         print(f"\n💡 Dica: Execute primeiro 'python3 dividir_planilha.py'")
         return 1
     
@@ -64,7 +73,27 @@ def processar_parte(numero_parte, pasta_partes='output/partes', pasta_saida='out
     arquivo_saida = os.path.join(pasta_saida, f'pagina_parte_{numero_parte}.html')
     
     try:
-        gerar_pagina_estatica(arquivo_entrada, arquivo_saida, numero_parte)
+        from gerar_paginas_estaticas import gerar_pagina_estatica
+        from remocoes import ARQUIVO_REMOCOES_PADRAO
+        from modelo_relevancia import ARQUIVO_MODELO_PADRAO
+        
+        arquivo_remocoes = ARQUIVO_REMOCOES_PADRAO if usar_remocoes else None
+        arquivo_modelo = ARQUIVO_MODELO_PADRAO if usar_modelo else None
+        
+        if perfil:
+            from perfil import PASTA_LOGS_PADRAO, executar_com_perfil
+            
+            limite = limite_perfil
+            if limite:
+                arquivo_saida = os.path.join(PASTA_LOGS_PADRAO, f'perfil_pagina_parte_{numero_parte}.html')
+            executar_com_perfil(gerar_pagina_estatica, arquivo_entrada, arquivo_saida, numero_parte,
+                                nome=f'perfil_parte_{numero_parte}', limite=limite,
+                                opcoes_transporte=opcoes_transporte, usar_cache=usar_cache,
+                                arquivo_remocoes=arquivo_remocoes, arquivo_modelo=arquivo_modelo)
+        else:
+            gerar_pagina_estatica(arquivo_entrada, arquivo_saida, numero_parte,
+                                  opcoes_transporte=opcoes_transporte, usar_cache=usar_cache,
+                                  arquivo_remocoes=arquivo_remocoes, arquivo_modelo=arquivo_modelo)
         
         print(f"\n{'='*80}")
         print(f"✅ PARTE {numero_parte} PROCESSADA COM SUCESSO!")
@@ -106,7 +135,32 @@ def processar_parte(numero_parte, pasta_partes='output/partes', pasta_saida='out
         traceback.print_exc()
         return 1
 
-def modo_interativo(pasta_partes='output/partes', pasta_saida='output/paginas_html'):
+def imprimir_status(partes_disponiveis, partes_processadas):
+    """Mostra quantas partes existem e quais já foram processadas"""
+    print(f"📦 Partes disponíveis: {len(partes_disponiveis)}")
+    print(f"✅ Partes processadas: {len(partes_processadas)}\n")
+    
+    print("Status de cada parte:")
+    print("-" * 50)
+    
+    for i, arquivo in enumerate(partes_disponiveis, 1):
+        status = "✅ Processada" if i in partes_processadas else "⏳ Pendente"
+        print(f"   {i}. {arquivo:<35} {status}")
+    
+    print("-" * 50)
+
+def mostrar_status(pasta_partes='output/partes', pasta_saida='output/paginas_html'):
+    """Status das partes sem perguntar nada (--status)"""
+    partes_disponiveis = listar_partes_disponiveis(pasta_partes)
+    
+    if not partes_disponiveis:
+        print(f"❌ Nenhuma parte encontrada em '{pasta_partes}/'")
+        return 1
+    
+    imprimir_status(partes_disponiveis, verificar_partes_processadas(pasta_saida))
+    return 0
+
+def modo_interativo(pasta_partes='output/partes', pasta_saida='output/paginas_html', opcoes_transporte=None):
     """Modo interativo para escolher qual parte processar"""
     
     print("\n" + "="*80)
@@ -125,17 +179,7 @@ def modo_interativo(pasta_partes='output/partes', pasta_saida='output/paginas_ht
     # Verificar partes já processadas
     partes_processadas = verificar_partes_processadas(pasta_saida)
     
-    print(f"📦 Partes disponíveis: {len(partes_disponiveis)}")
-    print(f"✅ Partes processadas: {len(partes_processadas)}\n")
-    
-    print("Status de cada parte:")
-    print("-" * 50)
-    
-    for i, arquivo in enumerate(partes_disponiveis, 1):
-        status = "✅ Processada" if i in partes_processadas else "⏳ Pendente"
-        print(f"   {i}. {arquivo:<35} {status}")
-    
-    print("-" * 50)
+    imprimir_status(partes_disponiveis, partes_processadas)
     
     # Perguntar qual parte processar
     print("\n💡 Escolha uma parte para processar:")
@@ -165,7 +209,7 @@ def modo_interativo(pasta_partes='output/partes', pasta_saida='output/paginas_ht
                     continue
             
             # Processar
-            return processar_parte(numero, pasta_partes, pasta_saida)
+            return processar_parte(numero, pasta_partes, pasta_saida, opcoes_transporte=opcoes_transporte)
             
         except ValueError:
             print("❌ Digite um número válido ou 'q' para sair")
@@ -190,8 +234,14 @@ Exemplos:
   # Processar parte 3
   python3 processar_parte.py -p 3
   
+  # Só mostrar o status das partes
+  python3 processar_parte.py --status
+  
   # Customizar pastas
   python3 processar_parte.py -p 2 --pasta-partes divisoes --pasta-saida htmls
+  
+  # Profiling dos 20 primeiros materiais da parte 1 (relatórios em output/logs/)
+  python3 processar_parte.py -p 1 --profile --profile-limite 20
 
 Fluxo recomendado:
   1. Dividir planilha:
@@ -222,19 +272,42 @@ Fluxo recomendado:
                         help='Pasta de saída (padrão: output/paginas_html)')
     parser.add_argument('-i', '--interativo', action='store_true',
                         help='Modo interativo (escolher parte)')
+    parser.add_argument('-s', '--status', action='store_true',
+                        help='Mostrar o status das partes e sair')
+    parser.add_argument('--profile', action='store_true',
+                        help='Executar com cProfile + tracemalloc (.prof, alocações e pilhas em output/logs/)')
+    parser.add_argument('--profile-limite', type=int, metavar='N',
+                        help='Com --profile, processar só os N primeiros materiais')
+    parser.add_argument('--sem-cache', action='store_true',
+                        help='Buscar tudo de novo, sem requisições condicionais nem resultados reaproveitados')
+    parser.add_argument('--sem-remocoes', action='store_true',
+                        help='Não excluir os produtos removidos pelos validadores (output/remocoes.json)')
+    parser.add_argument('--sem-modelo', action='store_true',
+                        help='Não descartar produtos pelo modelo de relevância (output/modelo/relevancia.npz)')
+    
+    adicionar_argumentos_log(parser)
+    adicionar_argumentos_transporte(parser)
     
     args = parser.parse_args()
     
+    if args.status:
+        return mostrar_status(args.pasta_partes, args.pasta_saida)
+    
+    configurar_logging_args(args)
+    opcoes_transporte = opcoes_transporte_args(args)
+    
     # Se não especificou parte nem modo interativo, usa interativo
     if args.parte is None and not args.interativo:
-        return modo_interativo(args.pasta_partes, args.pasta_saida)
+        return modo_interativo(args.pasta_partes, args.pasta_saida, opcoes_transporte)
     
     # Modo interativo explícito
     if args.interativo:
-        return modo_interativo(args.pasta_partes, args.pasta_saida)
+        return modo_interativo(args.pasta_partes, args.pasta_saida, opcoes_transporte)
     
     # Processar parte específica
-    return processar_parte(args.parte, args.pasta_partes, args.pasta_saida)
+    return processar_parte(args.parte, args.pasta_partes, args.pasta_saida,
+                           args.profile, args.profile_limite, opcoes_transporte, not args.sem_cache,
+                           not args.sem_remocoes, not args.sem_modelo)
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local das páginas geradas (output/paginas_html) para os validadores da rede
+
+- Envia a cópia .br ou .gz gravada na geração, conforme o Accept-Encoding
+- ETag forte (hash do arquivo enviado): recarregar uma página sem mudanças
+  custa um 304 sem corpo
+- Páginas HTML revalidam a cada acesso (Cache-Control: no-cache); os
+  demais arquivos ficam em cache no navegador (max-age)
+"""
+
+import mimetypes
+import os
+import socket
+import sys
+from email.utils import formatdate
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+from paginas_comprimidas import CacheEtags, comprimir_pasta, escolher_variante
+
+PASTA_PADRAO = 'output/paginas_html'
+PORTA_PADRAO = 8000
+
+# As páginas trazem os dados embutidos e mantêm o nome entre gerações: revalidar sempre (ETag)
+CACHE_HTML = 'no-cache'
+CACHE_ARQUIVOS = 'public, max-age=86400'
+
+class ManipuladorPaginas(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler com cópias pré-comprimidas, ETag e Cache-Control"""
+
+    etags = CacheEtags()
+    silencioso = False
+    protocol_version = 'HTTP/1.1'  # keep-alive: recarregar várias páginas na mesma conexão
+
+    def send_head(self):
+        caminho = self.translate_path(self.path)
+        if os.path.isdir(caminho):
+            indice = os.path.join(caminho, 'index.html')
+            # Sem barra final (redirecionamento) ou sem index.html (listagem): comportamento padrão
+            if not self.path.split('?', 1)[0].endswith('/') or not os.path.isfile(indice):
+                return super().send_head()
+            caminho = indice
+
+        if not os.path.isfile(caminho):
+            self.send_error(404, "Arquivo não encontrado")
+            return None
+
+        variante, codificacao = escolher_variante(caminho, self.headers.get('Accept-Encoding'))
+        etag = self.etags.obter(variante)
+        cabecalhos = {
+            'ETag': etag,
+            'Cache-Control': CACHE_HTML if caminho.endswith(('.html', '.htm')) else CACHE_ARQUIVOS,
+            'Vary': 'Accept-Encoding',
+        }
+
+        if etag in [e.strip() for e in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            for nome, valor in cabecalhos.items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            return None
+
+        arquivo = open(variante, 'rb')
+        try:
+            estado = os.fstat(arquivo.fileno())
+            self.send_response(200)
+            self.send_header('Content-Type', self.guess_type(caminho))
+            if codificacao:
+                self.send_header('Content-Encoding', codificacao)
+            self.send_header('Content-Length', str(estado.st_size))
+            self.send_header('Last-Modified', formatdate(estado.st_mtime, usegmt=True))
+            for nome, valor in cabecalhos.items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            return arquivo
+        except Exception:
+            arquivo.close()
+            raise
+
+    def guess_type(self, caminho):
+        tipo = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+        if tipo.startswith('text/') or tipo in ('application/javascript', 'application/json'):
+            tipo += '; charset=utf-8'
+        return tipo
+
+    def log_message(self, formato, *argumentos):
+        if not self.silencioso:
+            super().log_message(formato, *argumentos)
+
+def endereco_na_rede():
+    """IP desta máquina na rede local (para os validadores), ou None"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            # UDP não envia nada no connect; só escolhe a interface de saída
+            s.connect(('10.255.255.255', 1))
+            return s.getsockname()[0]
+    except OSError:
+        return None
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Serve as páginas geradas na rede local (com compressão e cache)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+As cópias .gz/.br são gravadas junto com as páginas; páginas antigas sem
+cópia atualizada são comprimidas na inicialização. Para .br instale brotli
+(pip install brotli); sem ele, só gzip.
+
+Exemplos:
+  # Servir {PASTA_PADRAO}/ na porta {PORTA_PADRAO}
+  python3 servir_paginas.py
+
+  # Outra porta, só nesta máquina
+  python3 servir_paginas.py --porta 8080 --host 127.0.0.1
+        """
+    )
+
+    parser.add_argument('-d', '--pasta', default=PASTA_PADRAO,
+                        help=f'Pasta das páginas (padrão: {PASTA_PADRAO})')
+    parser.add_argument('-p', '--porta', type=int, default=PORTA_PADRAO,
+                        help=f'Porta (padrão: {PORTA_PADRAO})')
+    parser.add_argument('--host', default='0.0.0.0',
+                        help='Endereço de escuta (padrão: 0.0.0.0, toda a rede)')
+    parser.add_argument('-q', '--silencioso', action='store_true',
+                        help='Não mostrar cada requisição')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.pasta):
+        print(f"❌ Pasta não encontrada: {args.pasta}")
+        print(f"\n💡 Gere as páginas primeiro: python3 processar_parte.py -p 1")
+        return 1
+
+    comprimidas = comprimir_pasta(args.pasta)
+    if comprimidas:
+        print(f"🗜️  {comprimidas} páginas sem cópia comprimida atualizada foram comprimidas")
+
+    ManipuladorPaginas.silencioso = args.silencioso
+    servidor = ThreadingHTTPServer((args.host, args.porta),
+                                   partial(ManipuladorPaginas, directory=os.path.abspath(args.pasta)))
+
+    print(f"\n🌐 Servindo {args.pasta}/")
+    print(f"   Nesta máquina: http://localhost:{args.porta}/")
+    ip = endereco_na_rede()
+    if ip and args.host in ('0.0.0.0', ''):
+        print(f"   Na rede:       http://{ip}:{args.porta}/")
+    print(f"\n   Ctrl+C para parar\n")
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n👋 Servidor parado")
+    finally:
+        servidor.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,6 @@ Script de TESTE RÁPIDO para o sistema de páginas estáticas
 Processa apenas alguns materiais para demonstração
 """
 
-import pandas as pd
 import os
 import sys
 import sys
@@ -13,6 +12,8 @@ import os
 # Adicionar diretório scripts ao path
 sys.path.insert(0, os.path.dirname(__file__))
 from gerar_paginas_estaticas import gerar_pagina_estatica
+from planilhas import carregar_planilha, salvar_tabela
+from configuracao_log import adicionar_argumentos_log, configurar_logging_args
 
 def criar_planilha_teste(num_materiais=5):
     """Cria planilha de teste com N primeiros materiais"""
@@ -23,7 +24,7 @@ def criar_planilha_teste(num_materiais=5):
         print("❌ Arquivo materiais.xlsx não encontrado!")
         return None
     
-    df = pd.read_excel('materiais.xlsx')
+    df = carregar_planilha('materiais.xlsx')
     
     if 'Nome' not in df.columns:
         print("❌ Planilha deve ter coluna 'Nome'")
@@ -31,8 +32,8 @@ def criar_planilha_teste(num_materiais=5):
     
     df_teste = df.head(num_materiais)
     
-    arquivo_teste = 'teste_materiais_estatica.xlsx'
-    df_teste.to_excel(arquivo_teste, index=False)
+    arquivo_teste = 'teste_materiais_estatica.pkl'
+    salvar_tabela(df_teste, arquivo_teste)
     
     print(f"✅ Planilha de teste criada: {arquivo_teste}")
     print(f"📊 Materiais selecionados:")
@@ -69,8 +70,12 @@ Exemplos:
     parser.add_argument('-n', '--num-materiais', type=int, default=5,
                         help='Número de materiais para testar (padrão: 5)')
     
+    adicionar_argumentos_log(parser)
+    
     args = parser.parse_args()
     
+    configurar_logging_args(args)
+    
     print("\n" + "="*80)
     print("🧪 TESTE RÁPIDO - SISTEMA DE PÁGINAS ESTÁTICAS")
     print("="*80)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Treina o modelo de relevância com as decisões dos validadores
+
+Exemplos positivos: produtos que ficaram nas exportações validadas
+(coluna Produtos_JSON). Negativos: produtos removidos (coluna
+Removidos_JSON das exportações e output/remocoes.json). Se o mesmo produto
+foi mantido numa exportação e removido depois, vale a remoção.
+
+O modelo é ajustado com 80% dos exemplos e o limiar de descarte é
+escolhido nos outros 20% para perder no máximo --perda-maxima dos produtos
+mantidos. O modelo salvo é esse mesmo: um modelo reajustado com todos os
+exemplos teria outras probabilidades e o limiar não valeria para ele.
+"""
+
+import json
+import os
+import sys
+import time
+import zlib
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+from historico_custos import chave_material
+from modelo_relevancia import ARQUIVO_MODELO_PADRAO, BITS_PADRAO, ModeloRelevancia
+from planilhas import ler_excel_streaming
+from remocoes import ARQUIVO_REMOCOES_PADRAO, carregar_remocoes, chave_produto
+from consolidar_exportacoes import PASTA_EXPORTACOES_PADRAO, listar_exportacoes
+
+PERDA_MAXIMA_PADRAO = 0.02
+
+def _registrar(decisoes, material, produto, rotulo):
+    """Guarda a decisão (material, nome, rotulo) do produto no material"""
+    nome = produto.get('nome')
+    if nome:
+        decisoes[(chave_material(material), chave_produto(produto))] = (material, nome, rotulo)
+
+def decisoes_das_exportacoes(decisoes, arquivos):
+    """Produtos mantidos (1) e removidos (0) de cada exportação, da mais antiga à mais recente"""
+    for arquivo in arquivos:
+        df = ler_excel_streaming(arquivo)
+        if 'Material' not in df.columns or 'Produtos_JSON' not in df.columns:
+            print(f"   ⚠️  {os.path.basename(arquivo)}: não é uma exportação das páginas, ignorada")
+            continue
+        removidos = df['Removidos_JSON'] if 'Removidos_JSON' in df.columns else [None] * len(df)
+        antes = len(decisoes)
+        for material, mantidos, retirados in zip(df['Material'], df['Produtos_JSON'], removidos):
+            if not isinstance(material, str):
+                continue
+            for produto in json.loads(mantidos) if isinstance(mantidos, str) else []:
+                _registrar(decisoes, material, produto, 1)
+            for produto in json.loads(retirados) if isinstance(retirados, str) else []:
+                _registrar(decisoes, material, produto, 0)
+        print(f"   📄 {os.path.basename(arquivo)}: {len(decisoes) - antes} decisões novas")
+
+def decisoes_das_remocoes(decisoes, remocoes):
+    """Removidos acumulados em remocoes.json (valem sobre as exportações)"""
+    for material, produtos in remocoes.items():
+        for id_produto, nome in produtos.items():
+            _registrar(decisoes, material, {'id': id_produto, 'nome': nome}, 0)
+
+def escolher_limiar(mantidos, removidos, perda_maxima):
+    """
+    Limiar de descarte (probabilidades da amostra de avaliação)
+
+    O maior limiar permitido perde perda_maxima dos mantidos; dentro dele,
+    fica o menor que descarta os mesmos removidos (a meio caminho entre o
+    último removido descartado e o mantido seguinte).
+    """
+    import numpy as np
+
+    maximo = float(np.quantile(mantidos, perda_maxima)) if perda_maxima > 0 else 0.0
+    descartados = removidos[removidos < maximo]
+    if not descartados.size:
+        return 0.0
+    ultimo = descartados.max()
+    seguintes = mantidos[mantidos > ultimo]
+    if not seguintes.size:
+        return maximo
+    return min(maximo, float(ultimo + seguintes.min()) / 2)
+
+def avaliar(rotulos, probabilidades, perda_maxima):
+    """Limiar que perde no máximo perda_maxima dos mantidos, e as métricas nesse limiar"""
+    import numpy as np
+
+    rotulos = np.asarray(rotulos)
+    mantidos = probabilidades[rotulos == 1]
+    removidos = probabilidades[rotulos == 0]
+    limiar = escolher_limiar(mantidos, removidos, perda_maxima)
+
+    # AUC pelos postos (Mann-Whitney)
+    ordem = np.argsort(probabilidades, kind='stable')
+    postos = np.empty(len(ordem))
+    postos[ordem] = np.arange(1, len(ordem) + 1)
+    area = (postos[rotulos == 1].sum() - len(mantidos) * (len(mantidos) + 1) / 2) / (len(mantidos) * len(removidos))
+
+    p = np.clip(probabilidades, 1e-7, 1 - 1e-7)
+    return {
+        'limiar': limiar,
+        'auc': float(area),
+        'log_loss': float(-np.mean(rotulos * np.log(p) + (1 - rotulos) * np.log(1 - p))),
+        'removidos_descartados': float((removidos < limiar).mean()),
+        'mantidos_perdidos': float((mantidos < limiar).mean()),
+    }
+
+def main():
+    import argparse
+    import numpy as np
+
+    parser = argparse.ArgumentParser(
+        description='Treina o modelo de relevância com as decisões dos validadores',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Usa as exportações validadas ({PASTA_EXPORTACOES_PADRAO}/) e as remoções
+importadas ({ARQUIVO_REMOCOES_PADRAO}). Com o modelo salvo em
+{ARQUIVO_MODELO_PADRAO}, processar_parte.py descarta os produtos com
+probabilidade abaixo do limiar (use --sem-modelo para desativar).
+
+Exemplos:
+  # Treinar com tudo o que já foi validado
+  python3 treinar_modelo_relevancia.py
+
+  # Mais conservador: perder no máximo 1% dos produtos que os validadores mantêm
+  python3 treinar_modelo_relevancia.py --perda-maxima 0.01
+
+  # Só avaliar, sem salvar
+  python3 treinar_modelo_relevancia.py --avaliar
+        """
+    )
+
+    parser.add_argument('exportacoes', nargs='*', default=[PASTA_EXPORTACOES_PADRAO],
+                        help=f'Planilhas exportadas, pastas ou padrões (padrão: {PASTA_EXPORTACOES_PADRAO})')
+    parser.add_argument('--remocoes', default=ARQUIVO_REMOCOES_PADRAO,
+                        help=f'Remoções importadas (padrão: {ARQUIVO_REMOCOES_PADRAO})')
+    parser.add_argument('-o', '--saida', default=ARQUIVO_MODELO_PADRAO,
+                        help=f'Arquivo do modelo (padrão: {ARQUIVO_MODELO_PADRAO})')
+    parser.add_argument('--perda-maxima', type=float, default=PERDA_MAXIMA_PADRAO, metavar='FRACAO',
+                        help=f'Fração máxima dos produtos mantidos que pode ser descartada '
+                             f'(padrão: {PERDA_MAXIMA_PADRAO:g})')
+    parser.add_argument('--bits', type=int, default=BITS_PADRAO,
+                        help=f'Tamanho do hash das características: 2^BITS pesos (padrão: {BITS_PADRAO})')
+    parser.add_argument('--epocas', type=int, default=150, help='Passadas do treino (padrão: 150)')
+    parser.add_argument('--avaliar', action='store_true', help='Só mostrar as métricas, sem salvar')
+
+    args = parser.parse_args()
+
+    print(f"\n{'='*80}")
+    print(f"🤖 TREINO DO MODELO DE RELEVÂNCIA")
+    print(f"{'='*80}\n")
+
+    decisoes = {}
+    arquivos = listar_exportacoes(args.exportacoes)
+    decisoes_das_exportacoes(decisoes, arquivos)
+    decisoes_das_remocoes(decisoes, carregar_remocoes(args.remocoes))
+
+    pares = [(material, nome) for material, nome, _ in decisoes.values()]
+    rotulos = np.array([rotulo for _, _, rotulo in decisoes.values()])
+    positivos = int(rotulos.sum())
+    negativos = len(rotulos) - positivos
+    print(f"\n📚 {len(rotulos)} decisões: {positivos} mantidos, {negativos} removidos")
+
+    if positivos < 20 or negativos < 20:
+        print(f"❌ Poucos exemplos para treinar (mínimo 20 de cada)")
+        print(f"\n💡 Exporte as páginas validadas para {PASTA_EXPORTACOES_PADRAO}/ e "
+              f"importe as remoções com importar_remocoes.py")
+        return 1
+
+    # Amostra de avaliação: 20% dos exemplos, sempre os mesmos (hash do material + produto)
+    avaliacao = np.array([zlib.crc32(f'{m}\n{p}'.encode('utf-8')) % 5 == 0 for m, p in decisoes])
+    treino = ~avaliacao
+    if len(set(rotulos[avaliacao])) < 2:
+        print(f"❌ A amostra de avaliação não tem mantidos e removidos; valide mais materiais")
+        return 1
+
+    inicio = time.perf_counter()
+    modelo = ModeloRelevancia.treinar([par for par, t in zip(pares, treino) if t], rotulos[treino],
+                                      bits=args.bits, epocas=args.epocas)
+    metricas = avaliar(rotulos[avaliacao],
+                       modelo.probabilidades_pares([par for par, a in zip(pares, avaliacao) if a]),
+                       args.perda_maxima)
+
+    print(f"\n📊 Avaliação ({int(avaliacao.sum())} exemplos fora do treino):")
+    print(f"   AUC: {metricas['auc']:.3f}   log-loss: {metricas['log_loss']:.3f}")
+    print(f"   Limiar: {metricas['limiar']:.3f}")
+    print(f"   🗑️  Removidos que o modelo descartaria: {metricas['removidos_descartados']:.1%}")
+    print(f"   ⚠️  Mantidos que o modelo descartaria: {metricas['mantidos_perdidos']:.1%}")
+
+    if args.avaliar:
+        return 0
+
+    # Salva o modelo avaliado, com o limiar escolhido para as probabilidades dele
+    modelo.limiar = metricas['limiar']
+    modelo.info = {'treinado_em': time.strftime('%Y-%m-%d %H:%M:%S'), 'mantidos': positivos,
+                   'removidos': negativos, 'exemplos_treino': int(treino.sum()),
+                   'exportacoes': len(arquivos), **metricas}
+    modelo.salvar(args.saida)
+
+    print(f"\n✅ Modelo treinado em {time.perf_counter() - inicio:.1f}s")
+    print(f"💾 {args.saida}")
+    print(f"\n💡 Nas próximas execuções, produtos com probabilidade < {modelo.limiar:.2f} saem da busca")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())